@@ -13,24 +13,68 @@ back again when you retrieve it.
 
 For Python3, by default, the conversion is always done automatically in
 both directions, so the extra step is not needed.
+
+Storage:
+the colors are kept as packed 0xAARRGGBB integers in an array('I') (4 bytes
+per swatch) rather than a list of QColor wrappers, the hex codes shown by
+the views are formatted from the integers and cached per distinct color;
+QColors are only created when a value is edited
 """
 
 
 import sys
+from array import array
 
 from Qt import QtGui, QtCore, QtWidgets
 
 
+SWATCH_SIZE = 26
+ITEM_PADDING = 4
+
+BLACK = 0xFF000000
+# the hex codes cache is emptied when it holds this many colors
+NAME_CACHE_SIZE = 4096
+
+
+def packColor(color):
+    """
+    :param color: QColor, str or int. color, hex code or 0xRRGGBB value
+    :return: int. packed 0xAARRGGBB value of the color, None if invalid
+    """
+    if not isinstance(color, QtGui.QColor):
+        color = QtGui.QColor(color)
+    if not color.isValid():
+        return None
+    return color.rgba()
+
+
+def packColors(colors):
+    """
+    :param colors: iterable. colors accepted by packColor(), or an
+    array('I') of packed values used as is
+    :return: array. packed 0xAARRGGBB values
+    """
+    if isinstance(colors, array) and colors.typecode == 'I':
+        return colors
+    packed = array('I')
+    for color in colors:
+        rgba = packColor(color)
+        packed.append(BLACK if rgba is None else rgba)
+    return packed
+
+
 class PaletteListModel(QtCore.QAbstractListModel):
     def __init__(self, colors, parent=None):
         """
         Initialization
 
-        :param colors: list. list of QColors
+        :param colors: list. list of QColors, see packColors()
         :param parent: QModelIndex. default to null pointer
         """
         QtCore.QAbstractListModel.__init__(self, parent)
-        self._colors = colors
+        self._colors = packColors(colors)
+        self._names = dict()
+        self._sizeHint = None
 
     def headerData(self, section, orientation, role):
         """
@@ -68,22 +112,53 @@ class PaletteListModel(QtCore.QAbstractListModel):
         :return:
         """
         row = index.row()
-        value = self._colors[row]
+        rgba = self._colors[row]
 
         if role == QtCore.Qt.EditRole:
-            return value.name()
+            return self.colorName(rgba)
 
         if role == QtCore.Qt.ToolTipRole:
-            return "Hex code: {}".format(value.name())
+            return "Hex code: {}".format(self.colorName(rgba))
 
         if role == QtCore.Qt.DecorationRole:
-            pixmap = QtGui.QPixmap(26, 26)
-            pixmap.fill(value)
+            pixmap = QtGui.QPixmap(SWATCH_SIZE, SWATCH_SIZE)
+            pixmap.fill(QtGui.QColor.fromRgba(rgba))
             icon = QtGui.QIcon(pixmap)
             return icon
 
         if role == QtCore.Qt.DisplayRole:
-            return value.name()
+            return self.colorName(rgba)
+
+        if role == QtCore.Qt.SizeHintRole:
+            return self.sizeHint()
+
+    def colorName(self, rgba):
+        """
+        Custom: hex code of a packed color, the same as QColor.name()
+
+        :param rgba: int. packed 0xAARRGGBB value
+        :return: str. '#rrggbb' hex code
+        """
+        name = self._names.get(rgba)
+        if name is None:
+            if len(self._names) >= NAME_CACHE_SIZE:
+                self._names.clear()
+            name = self._names[rgba] = '#{:06x}'.format(rgba & 0xFFFFFF)
+        return name
+
+    def sizeHint(self):
+        """
+        Custom: every swatch has the same size (icon and a hex code), so it
+        is measured once instead of for every row
+
+        :return: QSize. size of an item
+        """
+        if self._sizeHint is None:
+            metrics = QtGui.QFontMetrics(QtGui.QGuiApplication.font())
+            width = SWATCH_SIZE + metrics.width('#ffffff') + ITEM_PADDING
+            height = max(SWATCH_SIZE, metrics.height()) + ITEM_PADDING
+            self._sizeHint = QtCore.QSize(width, height)
+        return self._sizeHint
 
     def flags(self, index):
         """
@@ -113,9 +188,9 @@ class PaletteListModel(QtCore.QAbstractListModel):
         """
         if role == QtCore.Qt.EditRole:
             row = index.row()
-            color = QtGui.QColor(value)
-            if color.isValid():
-                self._colors[row] = color
+            rgba = packColor(value)
+            if rgba is not None:
+                self._colors[row] = rgba
 
                 # emit dataChanged signal to sync with display
                 self.dataChanged.emit(index, index)
@@ -139,8 +214,7 @@ class PaletteListModel(QtCore.QAbstractListModel):
         """
         self.beginInsertRows(parent, position, position + rows - 1)
 
-        for i in range(rows):
-            self._colors.insert(position, QtGui.QColor("#000000"))
+        self._colors[position:position] = array('I', [BLACK]) * rows
 
         self.endInsertRows()
         return True
@@ -161,9 +235,7 @@ class PaletteListModel(QtCore.QAbstractListModel):
         """
         self.beginRemoveRows(parent, position, position + rows - 1)
 
-        for i in range(rows):
-            value = self._colors[position]
-            self._colors.remove(value)
+        del self._colors[position:position + rows]
 
         self.endRemoveRows()
         return True
@@ -172,9 +244,13 @@ class PaletteListModel(QtCore.QAbstractListModel):
         """
         Custom: insert an item/row at the given position with given value
         """
-        self.beginInsertRows(parent, position, position+1)
+        rgba = packColor(value)
+        if rgba is None:
+            return False
+
+        self.beginInsertRows(parent, position, position)
 
-        self._colors.insert(position, value)
+        self._colors.insert(position, rgba)
 
         self.endInsertRows()
         return True
@@ -194,6 +270,8 @@ if __name__ == '__main__':
     model.insert(2, green)
 
     listView = QtWidgets.QListView()
+    # all items have the same size, the view doesn't need to ask each one
+    listView.setUniformItemSizes(True)
     listView.show()
     listView.setModel(model)
 
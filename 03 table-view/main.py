@@ -3,11 +3,31 @@ A demonstration on how to create QAbstractTableModel used in QTableView
 
 The TableModel and ListModel are similar in many ways, one of the main
 difference being the introduction of column; with that, the data model becomes
-two-dimensional so the internal instance variable which is the representation
-of the data self._colors is now a two-dimensional list instead of one-dimensional
+two-dimensional: the colors are given as a nested list (rows of columns) and
+stored row after row in a single array('I') of packed 0xAARRGGBB integers,
+the index of a cell being row * columnCount + column
 (The nested list for colors won't make sense in terms of the context
 but only serve as a demonstration).
 
+As in the list model, the hex codes are formatted from the packed integers
+and cached per distinct color, QColors are only created on edits.
+
+Indexed colors:
+real palettes repeat a few colors over many cells, in indexed mode the model
+keeps a table of the distinct colors and every cell only stores the position
+of its color in the table, as 1 byte (array('B')) while there are at most
+256 colors, 2 bytes (array('H')) up to 65536; recolor() then changes all the
+cells of a color by updating the table only. The table counts the cells
+using each of its entries, the entries no cell uses anymore are reused for
+the next new colors, so editing cells doesn't grow the table.
+
+Huge palettes:
+SwatchDelegate paints a cell from its packed color instead of the icon and
+text layout of the default delegate, and the "swatch grid" mode
+(SwatchGridView) skips the cells altogether: the palette is painted in tiles
+of TILE_CELLS x TILE_CELLS swatches, every tile being rendered in one pass
+from a block of the packed colors and cached until the model changes.
+
 The table model also doesn't need parent argument
 as it isn't a hierarchical model
 
@@ -16,30 +36,86 @@ subclassing: https://doc.qt.io/qt-5/qabstracttablemodel.html#subclassing
 """
 
 import sys
+from array import array
 
 from Qt import QtGui, QtCore, QtWidgets
 
 
+SWATCH_SIZE = 26
+ITEM_PADDING = 4
+
+BLACK = 0xFF000000
+# the hex codes cache is emptied when it holds this many colors
+NAME_CACHE_SIZE = 4096
+
+# largest color table position storable by each typecode of the indices
+INDEX_TYPECODES = (('B', 0xFF), ('H', 0xFFFF), ('I', 0xFFFFFFFF))
+
+# swatch grid: cells per side of a tile, and tiles kept rendered
+TILE_CELLS = 16
+TILE_CACHE_SIZE = 32
+GRID_SPACING = 1
+
+
+def packColor(color):
+    """
+    :param color: QColor, str or int. color, hex code or 0xRRGGBB value
+    :return: int. packed 0xAARRGGBB value of the color, None if invalid
+    """
+    if not isinstance(color, QtGui.QColor):
+        color = QtGui.QColor(color)
+    if not color.isValid():
+        return None
+    return color.rgba()
+
+
 class PaletteTableModel(QtCore.QAbstractTableModel):
-    def __init__(self, colors, headers, parent=None):
+    colorRole = QtCore.Qt.UserRole
+
+    def __init__(self, colors, headers, parent=None, indexed=False):
         """
         Override: initialization
 
-        :param colors: list. nested list of QColors
+        :param colors: list. nested list of QColors, see packColor()
         :param headers: list. header names
+        :param indexed: bool. store the colors in indexed mode
         """
         QtCore.QAbstractTableModel.__init__(self, parent)
-        self._colors = colors
+        self._columnCount = len(colors[0]) if colors else 0
+        # packed colors, or positions in the color table in indexed mode
+        self._cells = array('I')
+        self._table = None
+        self._tablePositions = None
+        self._tableUses = None
+        self._freePositions = None
+        for rowColors in colors:
+            for color in rowColors:
+                rgba = packColor(color)
+                self._cells.append(BLACK if rgba is None else rgba)
+        self._names = dict()
         self._headers = headers
+        self._sizeHint = None
+        self._revision = 0
+        if indexed:
+            self.setIndexed(True)
+
+    @property
+    def revision(self):
+        """
+        :return: int. counter increased on every change of the colors
+        """
+        return self._revision
 
     def rowCount(self, parent):
-        return len(self._colors)
+        if not self._columnCount:
+            return 0
+        return len(self._cells) // self._columnCount
 
     def columnCount(self, parent):
         """
         Override: number of columns (of the given parent).
         """
-        return len(self._colors[0])
+        return self._columnCount
 
     def flags(self, index):
         return (QtCore.Qt.ItemIsEditable |
@@ -49,31 +125,229 @@ class PaletteTableModel(QtCore.QAbstractTableModel):
     def data(self, index, role):
         row_index = index.row()
         column_index = index.column()
-        color = self._colors[row_index][column_index]
+        rgba = self._cells[row_index * self._columnCount + column_index]
+        if self._table is not None:
+            rgba = self._table[rgba]
 
         if role == QtCore.Qt.EditRole:
-            return color.name()
+            return self.colorName(rgba)
 
         if role == QtCore.Qt.ToolTipRole:
-            return "Hex code: {}".format(color.name())
+            return "Hex code: {}".format(self.colorName(rgba))
 
         if role == QtCore.Qt.DecorationRole:
-            pixmap = QtGui.QPixmap(26, 26)
-            pixmap.fill(color)
+            pixmap = QtGui.QPixmap(SWATCH_SIZE, SWATCH_SIZE)
+            pixmap.fill(QtGui.QColor.fromRgba(rgba))
             icon = QtGui.QIcon(pixmap)
             return icon
 
         if role == QtCore.Qt.DisplayRole:
-            return color.name()
+            return self.colorName(rgba)
+
+        if role == QtCore.Qt.SizeHintRole:
+            return self.sizeHint()
+
+        if role == PaletteTableModel.colorRole:
+            return rgba
+
+    def colorBlock(self, row, column, rows, columns):
+        """
+        Custom: packed colors of a block of cells, read straight from the
+        storage for the views painting many cells at once
+
+        :param row: int. first row of the block
+        :param column: int. first column of the block
+        :param rows: int. number of rows
+        :param columns: int. number of columns
+        :return: array. packed 0xAARRGGBB values, row after row
+        """
+        if not self._columnCount:
+            return array('I')
+        block = array(self._cells.typecode)
+        for start in range(row * self._columnCount + column,
+                           (row + rows) * self._columnCount,
+                           self._columnCount):
+            block.extend(self._cells[start:start + columns])
+        if self._table is not None:
+            block = array('I', map(self._table.__getitem__, block))
+        return block
+
+    # ------------ Indexed colors ---------------#
+
+    def isIndexed(self):
+        return self._table is not None
+
+    def setIndexed(self, indexed):
+        """
+        Custom: switch the storage between packed colors per cell and
+        indexed colors, the displayed colors don't change; switching to
+        indexed mode also drops the colors no cell uses anymore
+
+        :param indexed: bool. whether to store the colors in indexed mode
+        """
+        colors = self.colorBlock(
+            0, 0, self.rowCount(None), self._columnCount)
+        self._table = None
+        self._tablePositions = None
+        self._tableUses = None
+        self._freePositions = None
+        self._cells = colors
+        if not indexed:
+            return
+
+        self._table = array('I')
+        self._tablePositions = dict()
+        self._tableUses = list()
+        self._freePositions = list()
+        self._cells = array(INDEX_TYPECODES[0][0])
+        for rgba in colors:
+            value = self._acquireColor(rgba)
+            self._cells.append(value)
+
+    def colorTable(self):
+        """
+        Custom: in indexed mode, the packed colors the cells refer to, the
+        entries no cell uses anymore are kept until they are reused
+
+        :return: array. packed 0xAARRGGBB values, None when not indexed
+        """
+        return self._table
+
+    def _acquireColor(self, rgba, count=1):
+        """
+        :param rgba: int. packed color given to cells
+        :param count: int. number of cells given the color
+        :return: int. what the cells of the color store: the color itself,
+        or its position in the color table which is added if needed
+        """
+        if self._table is None:
+            return rgba
+        if not count:
+            # not stored by any cell
+            return 0
+        position = self._tablePositions.get(rgba)
+        if position is not None:
+            self._tableUses[position] += count
+            return position
+
+        if self._freePositions:
+            position = self._freePositions.pop()
+            self._table[position] = rgba
+            self._tableUses[position] = count
+        else:
+            position = len(self._table)
+            self._table.append(rgba)
+            self._tableUses.append(count)
+            # widen the indices once the table outgrows them
+            for typecode, largest in INDEX_TYPECODES:
+                if position <= largest:
+                    break
+            if typecode != self._cells.typecode:
+                self._cells = array(typecode, self._cells)
+        self._tablePositions[rgba] = position
+        return position
+
+    def _releaseColor(self, value, count=1):
+        """
+        :param value: int. what the cells stored, see _acquireColor()
+        :param count: int. number of cells not using it anymore
+        """
+        if self._table is None:
+            return
+        uses = self._tableUses
+        uses[value] -= count
+        if uses[value]:
+            return
+
+        self._freePositions.append(value)
+        rgba = self._table[value]
+        if self._tablePositions.get(rgba) == value:
+            del self._tablePositions[rgba]
+            # an earlier recolor may have left another entry of the color
+            for position, other in enumerate(self._table):
+                if other == rgba and uses[position]:
+                    self._tablePositions[rgba] = position
+                    break
+
+    def recolor(self, color, newColor):
+        """
+        Custom: replace the color of every cell having the given color, in
+        indexed mode only the color table is changed; the views are notified
+        with a single dataChanged over the whole table
+
+        :param color: QColor, str or int. color to replace, see packColor()
+        :param newColor: QColor, str or int. replacement color
+        :return: bool. whether any cell changed
+        """
+        rgba, newRgba = packColor(color), packColor(newColor)
+        if rgba is None or newRgba is None or rgba == newRgba:
+            return False
+
+        if self._table is None:
+            cells = self._cells
+            positions = [i for i, value in enumerate(cells) if value == rgba]
+            for i in positions:
+                cells[i] = newRgba
+        else:
+            # entries merged by an earlier recolor share the same color
+            positions = [i for i, value in enumerate(self._table)
+                         if value == rgba and self._tableUses[i]]
+            for i in positions:
+                self._table[i] = newRgba
+            if positions:
+                del self._tablePositions[rgba]
+                self._tablePositions.setdefault(newRgba, positions[0])
+        if not positions:
+            return False
+
+        self._revision += 1
+        self.dataChanged.emit(
+            self.index(0, 0),
+            self.index(self.rowCount(None) - 1, self._columnCount - 1))
+        return True
+
+    def colorName(self, rgba):
+        """
+        Custom: hex code of a packed color, the same as QColor.name()
+
+        :param rgba: int. packed 0xAARRGGBB value
+        :return: str. '#rrggbb' hex code
+        """
+        name = self._names.get(rgba)
+        if name is None:
+            if len(self._names) >= NAME_CACHE_SIZE:
+                self._names.clear()
+            name = self._names[rgba] = '#{:06x}'.format(rgba & 0xFFFFFF)
+        return name
+
+    def sizeHint(self):
+        """
+        Custom: every cell has the same size (icon and a hex code), so it
+        is measured once instead of for every cell
+
+        :return: QSize. size of a cell
+        """
+        if self._sizeHint is None:
+            metrics = QtGui.QFontMetrics(QtGui.QGuiApplication.font())
+            width = SWATCH_SIZE + metrics.width('#ffffff') + ITEM_PADDING
+            height = max(SWATCH_SIZE, metrics.height()) + ITEM_PADDING
+            self._sizeHint = QtCore.QSize(width, height)
+        return self._sizeHint
 
     def setData(self, index, value, role=QtCore.Qt.EditRole):
         row_index = index.row()
         column_index = index.column()
-        color = self._colors[row_index][column_index]
-        
+
         if role == QtCore.Qt.EditRole:
-            if color.isValid():
-                self._colors[row][column] = color
+            rgba = packColor(value)
+            if rgba is not None:
+                cell = row_index * self._columnCount + column_index
+                # acquired first, the entry isn't freed when the color is
+                # the same
+                value = self._acquireColor(rgba)
+                self._releaseColor(self._cells[cell])
+                self._cells[cell] = value
+                self._revision += 1
                 self.dataChanged.emit(index, index)
                 return True
 
@@ -91,12 +365,12 @@ class PaletteTableModel(QtCore.QAbstractTableModel):
 
     def insertRows(self, position, rows, parent=QtCore.QModelIndex()):
         self.beginInsertRows(parent, position, position+rows-1)
-        for i in range(rows):
-            default = [
-                QtGui.QColor("#000000")
-                for _ in range(self.columnCount(None))
-            ]
-            self._colors.insert(position, default)
+        start = position * self._columnCount
+        # may widen the indices, so before reading their typecode
+        value = self._acquireColor(BLACK, rows * self._columnCount)
+        self._cells[start:start] = (
+            array(self._cells.typecode, [value]) * (rows * self._columnCount))
+        self._revision += 1
         self.endInsertRows()
         return True
 
@@ -105,23 +379,263 @@ class PaletteTableModel(QtCore.QAbstractTableModel):
         Override: insert number of new columns into the model at the given
         column position under certain parent.
 
+        the rows are stored one after the other, so the array is rebuilt
+        row by row with the new cells in between
+
         :param position: int. starting column position to insert
         :param columns: int. number of columns to insert
         :param parent: QModelIndex. index of the parent
         :return: bool. whether or not operation succeeded
         """
         self.beginInsertColumns(parent, position, position+columns-1)
-        rows = self.rowCount(None)
-        for _ in range(columns):
-            for row_index in range(rows):
-                self._colors[row_index].insert(
-                    position,
-                    QtGui.QColor("#000000")
-                )
+        oldColumns = self._columnCount
+        value = self._acquireColor(BLACK, columns * self.rowCount(None))
+        default = array(self._cells.typecode, [value]) * columns
+        cells = array(self._cells.typecode)
+        for start in range(0, len(self._cells), max(1, oldColumns)):
+            cells.extend(self._cells[start:start + position])
+            cells.extend(default)
+            cells.extend(self._cells[start + position:start + oldColumns])
+        self._cells = cells
+        self._columnCount = oldColumns + columns
+        self._revision += 1
         self.endInsertColumns()
         return True
 
 
+class SwatchDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Paints a cell from its packed color (colorRole): the swatch is filled and
+    the hex code drawn, without building an icon for every paint
+    """
+    def paint(self, painter, option, index):
+        rect = option.rect
+        palette = option.palette
+        if option.state & QtWidgets.QStyle.State_Selected:
+            painter.fillRect(rect, palette.highlight())
+            textColor = palette.color(QtGui.QPalette.HighlightedText)
+        else:
+            textColor = palette.color(QtGui.QPalette.Text)
+
+        rgba = index.data(PaletteTableModel.colorRole)
+        swatch = QtCore.QRect(
+            rect.left() + ITEM_PADDING // 2,
+            rect.top() + (rect.height() - SWATCH_SIZE) // 2,
+            SWATCH_SIZE, SWATCH_SIZE)
+        painter.fillRect(swatch, QtGui.QColor.fromRgba(rgba))
+
+        painter.setPen(textColor)
+        painter.drawText(
+            rect.adjusted(SWATCH_SIZE + ITEM_PADDING, 0, 0, 0),
+            QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter,
+            index.data(QtCore.Qt.DisplayRole))
+
+    def sizeHint(self, option, index):
+        return index.data(QtCore.Qt.SizeHintRole)
+
+
+class SwatchGridView(QtWidgets.QAbstractScrollArea):
+    """
+    Swatch grid mode of a PaletteTableModel: swatches only, painted tile by
+    tile from the packed colors (see PaletteTableModel.colorBlock()); the
+    rendered tiles are cached for the revision of the model they were
+    rendered from, so scrolling only renders the tiles coming into view
+    """
+    # row, column
+    cellClicked = QtCore.Signal(int, int)
+
+    def __init__(self, parent=None):
+        super(SwatchGridView, self).__init__(parent)
+        self._model = None
+        self._tiles = dict()
+        self._tilesRevision = None
+        self._currentCell = None
+        self._pitch = SWATCH_SIZE + GRID_SPACING
+
+    def setModel(self, model):
+        """
+        :param model: PaletteTableModel. palette to display
+        """
+        if self._model is not None:
+            self._model.dataChanged.disconnect(self._onDataChanged)
+            for signal in self._layoutSignals(self._model):
+                signal.disconnect(self._onLayoutChanged)
+
+        self._model = model
+        self._tiles = dict()
+        self._currentCell = None
+        if model is not None:
+            model.dataChanged.connect(self._onDataChanged)
+            for signal in self._layoutSignals(model):
+                signal.connect(self._onLayoutChanged)
+        self._onLayoutChanged()
+
+    def model(self):
+        return self._model
+
+    @staticmethod
+    def _layoutSignals(model):
+        return (model.rowsInserted, model.rowsRemoved,
+                model.columnsInserted, model.columnsRemoved,
+                model.modelReset, model.layoutChanged)
+
+    def _onDataChanged(self, *args):
+        # the revision of the model changed, the tiles are rendered again
+        self.viewport().update()
+
+    def _onLayoutChanged(self, *args):
+        self._updateScrollBars()
+        self.viewport().update()
+
+    def _gridSize(self):
+        if self._model is None:
+            return 0, 0
+        return self._model.rowCount(None), self._model.columnCount(None)
+
+    def cellAt(self, pos):
+        """
+        :param pos: QPoint. position in the viewport
+        :return: tuple. (row, column) of the cell under the position, None
+        outside of the palette
+        """
+        rows, columns = self._gridSize()
+        x = pos.x() + self.horizontalScrollBar().value()
+        y = pos.y() + self.verticalScrollBar().value()
+        row, column = y // self._pitch, x // self._pitch
+        if 0 <= row < rows and 0 <= column < columns:
+            return row, column
+        return None
+
+    # ------------ Tiles ---------------#
+
+    def _tile(self, tileRow, tileColumn):
+        """
+        :return: QPixmap. rendered tile, from the cache when the model didn't
+        change since it was rendered
+        """
+        revision = self._model.revision
+        if revision != self._tilesRevision:
+            self._tiles = dict()
+            self._tilesRevision = revision
+
+        key = (tileRow, tileColumn)
+        pixmap = self._tiles.get(key)
+        if pixmap is None:
+            if len(self._tiles) >= TILE_CACHE_SIZE:
+                self._tiles = dict()
+            pixmap = self._tiles[key] = self._renderTile(tileRow, tileColumn)
+        return pixmap
+
+    def _renderTile(self, tileRow, tileColumn):
+        """
+        Render a tile in one pass: the packed colors of its cells are an
+        image of one pixel per cell (packed 0xAARRGGBB is the layout of
+        QImage.Format_ARGB32), which is scaled up to the swatches, then the
+        spacing between them is drawn over
+        """
+        rows, columns = self._gridSize()
+        row, column = tileRow * TILE_CELLS, tileColumn * TILE_CELLS
+        rows = min(TILE_CELLS, rows - row)
+        columns = min(TILE_CELLS, columns - column)
+
+        block = self._model.colorBlock(row, column, rows, columns)
+        data = block.tobytes()
+        image = QtGui.QImage(
+            data, columns, rows, columns * 4, QtGui.QImage.Format_ARGB32)
+
+        pitch = self._pitch
+        width, height = columns * pitch, rows * pitch
+        background = self.palette().color(QtGui.QPalette.Base)
+        pixmap = QtGui.QPixmap(width, height)
+        pixmap.fill(background)
+        painter = QtGui.QPainter(pixmap)
+        painter.drawImage(QtCore.QRect(0, 0, width, height), image)
+        for i in range(1, columns + 1):
+            painter.fillRect(
+                i * pitch - GRID_SPACING, 0, GRID_SPACING, height, background)
+        for i in range(1, rows + 1):
+            painter.fillRect(
+                0, i * pitch - GRID_SPACING, width, GRID_SPACING, background)
+        painter.end()
+        return pixmap
+
+    # ------------ Scrolling/Painting ---------------#
+
+    def _updateScrollBars(self):
+        rows, columns = self._gridSize()
+        for scrollBar, length, page in (
+                (self.verticalScrollBar(), rows * self._pitch,
+                 self.viewport().height()),
+                (self.horizontalScrollBar(), columns * self._pitch,
+                 self.viewport().width())):
+            scrollBar.setRange(0, max(0, length - page))
+            scrollBar.setPageStep(page)
+            scrollBar.setSingleStep(self._pitch)
+
+    def resizeEvent(self, event):
+        super(SwatchGridView, self).resizeEvent(event)
+        self._updateScrollBars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        """
+        Override: only the tiles intersecting the viewport are painted
+        """
+        rows, columns = self._gridSize()
+        if not rows or not columns:
+            return
+
+        left = self.horizontalScrollBar().value()
+        top = self.verticalScrollBar().value()
+        width, height = self.viewport().width(), self.viewport().height()
+        extent = TILE_CELLS * self._pitch
+        lastTileRow = min((top + height - 1) // extent,
+                          (rows - 1) // TILE_CELLS)
+        lastTileColumn = min((left + width - 1) // extent,
+                             (columns - 1) // TILE_CELLS)
+
+        painter = QtGui.QPainter(self.viewport())
+        for tileRow in range(top // extent, lastTileRow + 1):
+            for tileColumn in range(left // extent, lastTileColumn + 1):
+                painter.drawPixmap(
+                    tileColumn * extent - left, tileRow * extent - top,
+                    self._tile(tileRow, tileColumn))
+
+        if self._currentCell is not None:
+            row, column = self._currentCell
+            painter.setPen(self.palette().color(QtGui.QPalette.Highlight))
+            painter.drawRect(column * self._pitch - left,
+                             row * self._pitch - top,
+                             SWATCH_SIZE - 1, SWATCH_SIZE - 1)
+        painter.end()
+
+    # ------------ Interaction ---------------#
+
+    def mousePressEvent(self, event):
+        cell = self.cellAt(event.pos())
+        if cell is None:
+            return
+        self._currentCell = cell
+        self.viewport().update()
+        self.cellClicked.emit(*cell)
+
+    def viewportEvent(self, event):
+        if event.type() == QtCore.QEvent.ToolTip:
+            cell = self.cellAt(event.pos())
+            if cell is None:
+                QtWidgets.QToolTip.hideText()
+            else:
+                QtWidgets.QToolTip.showText(
+                    event.globalPos(),
+                    self._model.data(self._model.index(*cell),
+                                     QtCore.Qt.ToolTipRole),
+                    self.viewport())
+            return True
+        return super(SwatchGridView, self).viewportEvent(event)
+
+
 if __name__ == '__main__':
     app = QtWidgets.QApplication(sys.argv)
 
@@ -141,11 +655,38 @@ if __name__ == '__main__':
         "Technical",
         "Artist"
     ]
-    model = PaletteTableModel(data, color_headers)
+    # a few colors repeated over the cells, indexed mode stores 1 byte a cell
+    model = PaletteTableModel(data, color_headers, indexed=True)
     model.insertColumns(0, 5)
 
     tableView = QtWidgets.QTableView()
+    tableView.setItemDelegate(SwatchDelegate(tableView))
     tableView.setModel(model)
-    tableView.show()
+
+    # all cells have the same size, fixed sections skip measuring them
+    cellSize = model.sizeHint()
+    for header, length in ((tableView.horizontalHeader(), cellSize.width()),
+                           (tableView.verticalHeader(), cellSize.height())):
+        header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        header.setDefaultSectionSize(length)
+
+    # swatch grid mode, for palettes too big to read cell by cell
+    gridView = SwatchGridView()
+    gridView.setModel(model)
+    gridView.cellClicked.connect(
+        lambda row, column: tableView.setCurrentIndex(
+            model.index(row, column)))
+
+    views = QtWidgets.QStackedWidget()
+    views.addWidget(tableView)
+    views.addWidget(gridView)
+    gridMode = QtWidgets.QCheckBox('Swatch grid')
+    gridMode.toggled.connect(views.setCurrentIndex)
+
+    window = QtWidgets.QWidget()
+    layout = QtWidgets.QVBoxLayout(window)
+    layout.addWidget(gridMode)
+    layout.addWidget(views)
+    window.show()
 
     sys.exit(app.exec_())
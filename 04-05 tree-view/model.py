@@ -12,6 +12,10 @@ but is used for accessing top-level items.
 Even if top-level item(s) doesn't have a root, we pretend they share this
 invisible root.
 https://www.qtcentre.org/threads/70103-QModelIndex-value-for-the-root-of-a-tree-model
+
+The rows of a node type all have the same size, SizeHintRole returns a size
+measured once per type so the views don't measure the icon and text of
+every row
 """
 
 from Qt import QtCore, QtGui
@@ -19,6 +23,11 @@ from Qt import QtCore, QtGui
 import node
 
 
+ICON_SIZE = 16
+ROW_PADDING = 4
+SECTION_WIDTH = 150
+
+
 class SceneGraphModel(QtCore.QAbstractItemModel):
     def __init__(self, root):
         """
@@ -28,6 +37,8 @@ class SceneGraphModel(QtCore.QAbstractItemModel):
         """
         super(SceneGraphModel, self).__init__()
         self._rootNode = root
+        # node type -> size hint
+        self._sizeHints = dict()
 
     def rowCount(self, parent):
         """
@@ -65,6 +76,23 @@ class SceneGraphModel(QtCore.QAbstractItemModel):
         if role == QtCore.Qt.DecorationRole:
             if index.column() == 0:
                 return currentNode.icon
+        if role == QtCore.Qt.SizeHintRole:
+            return self._sizeHint(currentNode)
+
+    def _sizeHint(self, currentNode):
+        """
+        Custom: size of the rows of the node type (with or without icon),
+        measured on the first row of the type
+        """
+        size = self._sizeHints.get(currentNode.type)
+        if size is None:
+            metrics = QtGui.QFontMetrics(QtGui.QGuiApplication.font())
+            height = metrics.height()
+            if currentNode.icon is not None:
+                height = max(height, ICON_SIZE)
+            size = QtCore.QSize(SECTION_WIDTH, height + ROW_PADDING)
+            self._sizeHints[currentNode.type] = size
+        return size
 
     def setData(self, index, value, role=QtCore.Qt.EditRole):
         if index.isValid():
@@ -0,0 +1,134 @@
+"""
+Load .ui files from precompiled python modules instead of parsing the xml
+on every launch
+
+The compiled modules live next to the .ui files in a __uicache__ folder,
+one per binding (e.g. __uicache__/mainWindow_PyQt5.py). loadUi() uses the
+compiled module when it is newer than the .ui file and falls back to
+Qt._loadUi when it is missing or stale
+
+build the cache of this folder with:
+    python uiLoader.py
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+
+import Qt
+from Qt import _loadUi
+
+
+MODULE_PATH = os.path.dirname(os.path.abspath(__file__))
+CACHE_FOLDER = '__uicache__'
+
+# compiled module path -> Ui_ class, so each module is only imported once
+_UI_CLASSES = dict()
+
+
+def compiledPath(uiFile):
+    """
+    :param uiFile: str. path of the .ui file
+    :return: str. path of its compiled module for the current binding
+    """
+    folder, fileName = os.path.split(uiFile)
+    name = os.path.splitext(fileName)[0]
+    return os.path.join(
+        folder, CACHE_FOLDER, '{}_{}.py'.format(name, Qt.__binding__))
+
+
+def isFresh(uiFile):
+    """
+    :param uiFile: str. path of the .ui file
+    :return: bool. whether the compiled module exists and is up to date
+    """
+    pyFile = compiledPath(uiFile)
+    if not os.path.isfile(pyFile):
+        return False
+    return os.path.getmtime(pyFile) >= os.path.getmtime(uiFile)
+
+
+def compileUi(uiFile):
+    """
+    Compile the .ui file into a python module in the cache folder
+
+    :param uiFile: str. path of the .ui file
+    :return: str. path of the compiled module
+    """
+    pyFile = compiledPath(uiFile)
+    folder = os.path.dirname(pyFile)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    if Qt.__binding__.startswith('PyQt'):
+        uic = importlib.import_module(Qt.__binding__ + '.uic')
+        with open(pyFile, 'w') as f:
+            uic.compileUi(uiFile, f)
+    else:
+        # PySide ships the compiler as an executable, e.g. pyside2-uic
+        command = '{}-uic'.format(Qt.__binding__.lower())
+        subprocess.check_call([command, uiFile, '-o', pyFile])
+    return pyFile
+
+
+def _uiClass(pyFile):
+    uiClass = _UI_CLASSES.get(pyFile)
+    if uiClass is None:
+        namespace = dict()
+        with open(pyFile) as f:
+            code = compile(f.read(), pyFile, 'exec')
+        exec(code, namespace)
+        for name, value in namespace.items():
+            if name.startswith('Ui_'):
+                uiClass = value
+                break
+        _UI_CLASSES[pyFile] = uiClass
+    return uiClass
+
+
+def loadUi(uiFile, baseInstance):
+    """
+    Drop-in replacement of Qt._loadUi(uiFile, baseInstance): the child
+    widgets and layouts are set as attributes of the base instance
+
+    :param uiFile: str. path of the .ui file
+    :param baseInstance: QWidget. widget to build the interface in
+    :return: QWidget. the base instance
+    """
+    if not isFresh(uiFile):
+        return _loadUi(uiFile, baseInstance)
+
+    uiClass = _uiClass(compiledPath(uiFile))
+    if uiClass is None:
+        return _loadUi(uiFile, baseInstance)
+
+    ui = uiClass()
+    ui.setupUi(baseInstance)
+    for name, value in vars(ui).items():
+        setattr(baseInstance, name, value)
+    return baseInstance
+
+
+def compileFolder(folder=MODULE_PATH):
+    """
+    Compile all the stale .ui files under the folder
+
+    :param folder: str. folder to search the .ui files in
+    :return: list. paths of the compiled modules
+    """
+    compiled = list()
+    for root, folders, fileNames in os.walk(folder):
+        for fileName in sorted(fileNames):
+            if not fileName.endswith('.ui'):
+                continue
+            uiFile = os.path.join(root, fileName)
+            if not isFresh(uiFile):
+                compiled.append(compileUi(uiFile))
+    return compiled
+
+
+if __name__ == '__main__':
+    folder = sys.argv[1] if len(sys.argv) > 1 else MODULE_PATH
+    for pyFile in compileFolder(folder):
+        print('compiled: {}'.format(pyFile))
@@ -7,10 +7,10 @@ import os
 import sys
 
 from Qt import QtWidgets, QtCore
-from Qt import _loadUi
 
 import model
 import node
+import uiLoader
 
 
 MODULE_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -20,7 +20,7 @@ UI_FILE = os.path.join(MODULE_PATH, 'main.ui')
 class TreeModelMainWindow(QtWidgets.QMainWindow):
     def __init__(self):
         super(TreeModelMainWindow, self).__init__()
-        _loadUi(UI_FILE, self)
+        uiLoader.loadUi(UI_FILE, self)
 
         # this node will never get displayed, also known as invisible root
         rootNode = node.Node("Hips")
@@ -44,6 +44,14 @@ class TreeModelMainWindow(QtWidgets.QMainWindow):
         self._proxyModel.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
 
         self.centralTreeView.setModel(self._proxyModel)
+
+        # every row has the same height, the view only measures the first
+        # one instead of every row on layout
+        self.centralTreeView.setUniformRowHeights(True)
+        header = self.centralTreeView.header()
+        header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        header.setDefaultSectionSize(model.SECTION_WIDTH)
+        header.setStretchLastSection(True)
         self.filterLineEdit.textChanged.connect(self._proxyModel.setFilterRegExp)
         self.centralTreeView.setSortingEnabled(True)
 
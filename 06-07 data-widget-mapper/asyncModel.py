@@ -0,0 +1,169 @@
+"""
+Asyncio facade of the models, so asyncio tools (e.g. a scene fed by the
+network) can drive a SceneGraphModel or the palette models without blocking
+the paints
+
+the models still live in the Qt thread: the Qt events are processed by a
+task of the asyncio loop (see runWithQt), and the bulk operations are split
+into chunks, yielding to the loop between them so the views repaint
+
+python 3 only, the rest of the lessons don't import this module
+
+example:
+    async def main(sceneModel):
+        facade = AsyncModel(sceneModel)
+        await facade.insertNodes(parentNode, 0, lights)
+        await facade.setValues(updates)
+        async for row, name in facade.rows():
+            print(row, name)
+
+    runWithQt(app, main(sceneModel))
+"""
+
+import asyncio
+
+from Qt import QtCore
+
+import undoCommands
+
+
+CHUNK_SIZE = 500
+PUMP_INTERVAL = 0.005
+
+
+async def pumpQt(app, interval=PUMP_INTERVAL):
+    """
+    Process the pending Qt events forever, as a task of the asyncio loop
+
+    :param app: QApplication. application of the models and views
+    :param interval: float. seconds between two passes
+    """
+    while True:
+        app.processEvents()
+        await asyncio.sleep(interval)
+
+
+def runWithQt(app, coroutine, interval=PUMP_INTERVAL):
+    """
+    Run the coroutine on an asyncio loop processing the Qt events meanwhile
+
+    :param app: QApplication. application of the models and views
+    :param coroutine: coroutine. main coroutine of the tool
+    :param interval: float. seconds between two passes of the Qt events
+    :return: result of the coroutine
+    """
+    async def main():
+        pump = asyncio.ensure_future(pumpQt(app, interval))
+        try:
+            return await coroutine
+        finally:
+            pump.cancel()
+            app.processEvents()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+async def _asyncIter(values):
+    for value in values:
+        yield value
+
+
+class AsyncModel(object):
+    def __init__(self, model, chunkSize=CHUNK_SIZE):
+        """
+        Initialization
+
+        :param model: QAbstractItemModel. SceneGraphModel, PaletteListModel,
+        PaletteTableModel or any model implementing setData/insertRows
+        :param chunkSize: int. number of rows/values handled between two
+        yields to the loop
+        """
+        self._model = model
+        self._chunkSize = chunkSize
+
+    @property
+    def model(self):
+        return self._model
+
+    async def insertRows(self, position, count, parent=QtCore.QModelIndex()):
+        """
+        Insert default rows through the model's insertRows(), in chunks
+
+        :param position: int. row position to insert
+        :param count: int. number of rows to insert
+        :param parent: QModelIndex. parent of the rows
+        :return: bool. whether all the chunks were inserted
+        """
+        done = 0
+        while done < count:
+            rows = min(self._chunkSize, count - done)
+            if not self._model.insertRows(position + done, rows, parent):
+                return False
+            done += rows
+            await asyncio.sleep(0)
+        return True
+
+    async def insertNodes(self, parentNode, position, nodes):
+        """
+        Insert existing nodes into a SceneGraphModel, in chunks; every chunk
+        is one command of the model's undo stack
+
+        :param parentNode: Node. node to insert the children under
+        :param position: int. row position to insert
+        :param nodes: list. nodes to be inserted
+        """
+        nodes = list(nodes)
+        undoStack = self._model.undoStack()
+        for start in range(0, len(nodes), self._chunkSize):
+            chunk = nodes[start:start + self._chunkSize]
+            undoStack.push(undoCommands.InsertNodesCommand(
+                self._model, parentNode, position + start, chunk))
+            await asyncio.sleep(0)
+
+    async def setValues(self, values, role=QtCore.Qt.EditRole):
+        """
+        Edit many values, yielding to the loop every chunk
+
+        :param values: iterable or async iterable. (index, value) pairs, an
+        async iterable lets the values be fed as they arrive (e.g. from a
+        socket or an asyncio.Queue wrapper)
+        :param role: int. role of the edits
+        :return: int. number of accepted edits
+        """
+        if not hasattr(values, '__aiter__'):
+            values = _asyncIter(values)
+
+        accepted = 0
+        pending = 0
+        async for index, value in values:
+            accepted += bool(self._model.setData(index, value, role))
+            pending += 1
+            if pending >= self._chunkSize:
+                pending = 0
+                await asyncio.sleep(0)
+        return accepted
+
+    async def rows(self, parent=QtCore.QModelIndex(), column=0,
+                   role=QtCore.Qt.DisplayRole):
+        """
+        Iterate the rows of the parent, yielding to the loop every chunk; the
+        row count is read again after every chunk so rows inserted or removed
+        meanwhile are taken into account
+
+        :param parent: QModelIndex. parent of the rows
+        :param column: int. column to read
+        :param role: int. role to read
+        :return: async generator. (row, data) pairs
+        """
+        row = 0
+        while row < self._model.rowCount(parent):
+            end = min(row + self._chunkSize, self._model.rowCount(parent))
+            for current in range(row, end):
+                index = self._model.index(current, column, parent)
+                yield current, self._model.data(index, role)
+            row = end
+            await asyncio.sleep(0)
@@ -1,24 +1,63 @@
 """
 The supplement class for custom DataMapperWidget to be displayed and connected
 in the main window.
+
+Editors of specific node types are registered in EDITOR_TYPES by
+registerEditor(), so the main window only builds the editor of a type when
+a node of that type is selected for the first time
+
+the editors display the current node; when several nodes are selected, an
+edit of a property of the light, camera or transform editors is applied to
+all the selected nodes having the property as one undo command (see
+SceneGraphModel.setEditGroup), renaming only renames the current node
+
+the edits are not submitted by the QDataWidgetMapper itself, the editors
+collect the changed widgets and commit them together according to their
+commit policy:
+    COMMIT_MANUAL       only when commit() is called
+    COMMIT_FOCUS_OUT    when a widget loses focus or finishes editing
+    COMMIT_THROTTLED    at most rate times per second while editing, and
+                        when a widget loses focus
+the pending edits are committed before the editor displays another node
 """
 
+import functools
 import os
 
-from Qt import QtWidgets, QtCore, QtGui, QtXml
-from Qt import _loadUi
+from Qt import QtWidgets, QtCore
 
 import node
+import uiLoader
 
 
 MODULE_PATH = os.path.dirname(os.path.abspath(__file__))
 UI_FOLDER = os.path.join(MODULE_PATH, 'ui')
 
+# node type -> DataMapperWidget class editing the type specific properties
+EDITOR_TYPES = dict()
+
+COMMIT_MANUAL, COMMIT_FOCUS_OUT, COMMIT_THROTTLED = range(3)
+# commits per second of COMMIT_THROTTLED
+COMMIT_RATE = 10
+
+
+def registerEditor(nodeType, editorClass):
+    """
+    Register the editor class used for the given node type
+
+    :param nodeType: str. node type, see Node.type
+    :param editorClass: type. DataMapperWidget subclass
+    """
+    EDITOR_TYPES[nodeType] = editorClass
+
 
 class DataMapperWidget(QtWidgets.QWidget):
     """
     Abstract class for widget with data mapper setup
     """
+    nodeClass = node.Node
+    mapping = ()
+
     def __init__(self, model, parent=None):
         """
         Initialization creates a QDataWidgetMapper and connects it with
@@ -29,6 +68,19 @@ class DataMapperWidget(QtWidgets.QWidget):
         """
         super(DataMapperWidget, self).__init__(parent)
         self._dataMapper = QtWidgets.QDataWidgetMapper()
+        self._dataMapper.setSubmitPolicy(
+            QtWidgets.QDataWidgetMapper.ManualSubmit)
+        self._current = QtCore.QPersistentModelIndex()
+
+        # mapped widget -> Column declaration, and the widgets changed
+        # since the last commit
+        self._declarations = dict()
+        self._pending = set()
+        self._policy = COMMIT_FOCUS_OUT
+        self._commitTimer = QtCore.QTimer(self)
+        self._commitTimer.setSingleShot(True)
+        self._commitTimer.setInterval(1000 // COMMIT_RATE)
+        self._commitTimer.timeout.connect(self.commit)
 
         # proxy model needs to be converted to source model
         # https://doc.qt.io/qt-5/qdatawidgetmapper.html#setModel
@@ -41,9 +93,125 @@ class DataMapperWidget(QtWidgets.QWidget):
         Custom: this sets mapping for specific widget item to specific
         model item.
 
+        the subclasses declare nodeClass and mapping, a tuple of (widget
+        name, node property) pairs; the model gives the column of the
+        property and the Column declaration of the node class gives the
+        widget property
+
         # https://doc.qt.io/qt-5/qdatawidgetmapper.html#addMapping
         """
-        pass
+        model = self._dataMapper.model()
+        for widgetName, attr in self.mapping:
+            column = model.columnForAttr(attr)
+            widget = getattr(self, widgetName)
+            declaration = self.nodeClass.COLUMNS[
+                self.nodeClass.columnIndex(attr)]
+            mapperProperty = declaration.mapperProperty
+            if mapperProperty:
+                self._dataMapper.addMapping(widget, column, mapperProperty)
+            else:
+                self._dataMapper.addMapping(widget, column)
+            self._watch(widget, declaration)
+
+    def _propertyName(self, widget):
+        return bytes(self._dataMapper.mappedPropertyName(widget)).decode()
+
+    def _watch(self, widget, declaration):
+        """
+        Track the changes of the mapped property of the widget through its
+        notify signal, e.g. valueChanged for the value of a spinbox
+        """
+        self._declarations[widget] = declaration
+        metaObject = widget.metaObject()
+        metaProperty = metaObject.property(
+            metaObject.indexOfProperty(self._propertyName(widget)))
+        if metaProperty.hasNotifySignal():
+            signalName = bytes(metaProperty.notifySignal().name()).decode()
+            getattr(widget, signalName).connect(
+                functools.partial(self._onWidgetChanged, widget))
+        if hasattr(widget, 'editingFinished'):
+            widget.editingFinished.connect(self._onEditingFinished)
+        widget.installEventFilter(self)
+
+    def _onWidgetChanged(self, widget, *args):
+        self._pending.add(widget)
+        if (self._policy == COMMIT_THROTTLED
+                and not self._commitTimer.isActive()):
+            self._commitTimer.start()
+
+    def _onEditingFinished(self):
+        if self._policy != COMMIT_MANUAL:
+            self.commit()
+
+    def eventFilter(self, watched, event):
+        """
+        Override: commit when a mapped widget loses focus
+        """
+        if (event.type() == QtCore.QEvent.FocusOut
+                and self._policy != COMMIT_MANUAL):
+            self.commit()
+        return super(DataMapperWidget, self).eventFilter(watched, event)
+
+    def setCommitPolicy(self, policy, rate=None):
+        """
+        Custom: when the edited values are committed to the model
+
+        :param policy: int. COMMIT_MANUAL, COMMIT_FOCUS_OUT or
+        COMMIT_THROTTLED
+        :param rate: int. commits per second of COMMIT_THROTTLED
+        """
+        self._policy = policy
+        if rate:
+            self._commitTimer.setInterval(max(1, 1000 // rate))
+        if policy != COMMIT_THROTTLED:
+            self._commitTimer.stop()
+
+    def commitPolicy(self):
+        return self._policy
+
+    def hasPendingEdits(self):
+        return bool(self._pending)
+
+    def commit(self):
+        """
+        Custom: commit the changed widgets to the displayed node, as one
+        transaction of the undo stack when several properties changed; the
+        widgets still showing the value of the model are skipped (e.g.
+        refreshed by the mapper after an undo)
+        """
+        self._commitTimer.stop()
+        pending, self._pending = self._pending, set()
+        current = QtCore.QModelIndex(self._current)
+        if not pending or not current.isValid():
+            return
+
+        model = self._dataMapper.model()
+        edits = list()
+        for widget in pending:
+            column = self._dataMapper.mappedSection(widget)
+            index = current.sibling(current.row(), column)
+            value = widget.property(self._propertyName(widget))
+            convert = self._declarations[widget].convert or (lambda v: v)
+            if convert(value) != convert(index.data(QtCore.Qt.EditRole)):
+                edits.append((index, value))
+        if not edits:
+            return
+
+        undoStack = model.undoStack()
+        if len(edits) > 1:
+            undoStack.beginMacro('Edit {} properties'.format(len(edits)))
+        for index, value in sorted(edits, key=lambda edit: edit[0].column()):
+            model.setData(index, value)
+        if len(edits) > 1:
+            undoStack.endMacro()
+
+    def revert(self):
+        """
+        Custom: drop the pending edits and display the model values again
+        """
+        self._commitTimer.stop()
+        self._pending = set()
+        self._dataMapper.revert()
 
     def setSelection(self, current):
         """
@@ -53,61 +221,145 @@ class DataMapperWidget(QtWidgets.QWidget):
         # https://doc.qt.io/qt-5/qdatawidgetmapper.html#setRootIndex
         # https://doc.qt.io/qt-5/qdatawidgetmapper.html#setCurrentModelIndex
 
+        re-selecting the index already displayed is skipped, as every
+        setCurrentModelIndex() reads all the mapped columns again; the mapper
+        keeps itself up to date through the model's dataChanged()
+
         :param current: QModelIndex. current model item index being selected
         """
+        if current.isValid() and self._current == current:
+            return
+        self.commit()
+        self._current = QtCore.QPersistentModelIndex(current)
+
         parent = current.parent()
-        self._dataMapper.setRootIndex(parent)
+        if self._dataMapper.rootIndex() != parent:
+            self._dataMapper.setRootIndex(parent)
         self._dataMapper.setCurrentModelIndex(current)
 
 
+class MapperManager(QtCore.QObject):
+    """
+    Keeps the data mappers of the displayed editors on the current index:
+    hidden editors are skipped and only catch up once they are displayed
+    again, and editors already displaying the index are not refreshed
+    """
+    def __init__(self, parent=None):
+        super(MapperManager, self).__init__(parent)
+        self._editors = list()
+        self._current = QtCore.QPersistentModelIndex()
+        self._policy = COMMIT_FOCUS_OUT
+        self._rate = COMMIT_RATE
+
+    def addEditor(self, editor):
+        """
+        Custom: manage the data mapper of the editor
+
+        :param editor: DataMapperWidget. editor to manage
+        """
+        editor.setCommitPolicy(self._policy, self._rate)
+        self._editors.append(editor)
+
+    def setCommitPolicy(self, policy, rate=COMMIT_RATE):
+        """
+        Custom: commit policy of all the editors, see
+        DataMapperWidget.setCommitPolicy()
+        """
+        self._policy = policy
+        self._rate = rate
+        for editor in self._editors:
+            editor.setCommitPolicy(policy, rate)
+
+    def commit(self):
+        """
+        Custom: commit the pending edits of all the editors
+        """
+        for editor in self._editors:
+            editor.commit()
+
+    def setCurrentIndex(self, current):
+        """
+        Custom: point the mappers of the visible editors at the index
+
+        :param current: QModelIndex. source model index being selected
+        """
+        # hidden editors aren't refreshed, their edits are committed now
+        self.commit()
+        self._current = QtCore.QPersistentModelIndex(current)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Custom: bring the visible editors up to the current index, called
+        again whenever a hidden editor gets displayed
+        """
+        current = QtCore.QModelIndex(self._current)
+        for editor in self._editors:
+            if not editor.isHidden():
+                editor.setSelection(current)
+
+
 class NodeEditor(DataMapperWidget):
+    nodeClass = node.Node
+    mapping = (
+        ('uiName', 'name'),
+        ('uiType', 'type'),
+    )
+
     def __init__(self, model, parent=None):
         super(NodeEditor, self).__init__(model, parent)
-        _loadUi(os.path.join(UI_FOLDER, 'nodeEditor.ui'), self)
+        uiLoader.loadUi(os.path.join(UI_FOLDER, 'nodeEditor.ui'), self)
         self.addMapping()
 
-    def addMapping(self):
-        self._dataMapper.addMapping(self.uiName, 0)
-        self._dataMapper.addMapping(self.uiType, 1)
-
 
 class LightEditor(DataMapperWidget):
+    nodeClass = node.LightNode
+    mapping = (
+        ('uiLightIntensity', 'intensity'),
+        ('uiNear', 'nearRange'),
+        ('uiFar', 'farRange'),
+        ('uiShadows', 'castShadows'),
+        ('uiShape', 'shape'),
+    )
+
     def __init__(self, model, parent=None):
         super(LightEditor, self).__init__(model, parent)
-        _loadUi(os.path.join(UI_FOLDER, 'lightEditor.ui'), self)
+        uiLoader.loadUi(os.path.join(UI_FOLDER, 'lightEditor.ui'), self)
 
         for shape in node.LightShapes:
             self.uiShape.addItem(shape.name)
         self.addMapping()
 
-    def addMapping(self):
-        self._dataMapper.addMapping(self.uiLightIntensity, 2)
-        self._dataMapper.addMapping(self.uiNear, 3)
-        self._dataMapper.addMapping(self.uiFar, 4)
-        self._dataMapper.addMapping(self.uiShadows, 5)
-        self._dataMapper.addMapping(self.uiShape, 6, "currentIndex")
-
 
 class CameraEditor(DataMapperWidget):
+    nodeClass = node.CameraNode
+    mapping = (
+        ('uiMotionBlur', 'motionBlur'),
+        ('uiShakeIntensity', 'shakeIntensity'),
+    )
+
     def __init__(self, model, parent=None):
         super(CameraEditor, self).__init__(model, parent)
-        _loadUi(os.path.join(UI_FOLDER, 'cameraEditor.ui'), self)
+        uiLoader.loadUi(os.path.join(UI_FOLDER, 'cameraEditor.ui'), self)
 
         self.addMapping()
 
-    def addMapping(self):
-        self._dataMapper.addMapping(self.uiMotionBlur, 2)
-        self._dataMapper.addMapping(self.uiShakeIntensity, 3)
-
 
 class TransformEditor(DataMapperWidget):
+    nodeClass = node.TransformNode
+    mapping = (
+        ('uiX', 'x'),
+        ('uiY', 'y'),
+        ('uiZ', 'z'),
+    )
+
     def __init__(self, model, parent=None):
         super(TransformEditor, self).__init__(model, parent)
-        _loadUi(os.path.join(UI_FOLDER, 'transformEditor.ui'), self)
+        uiLoader.loadUi(os.path.join(UI_FOLDER, 'transformEditor.ui'), self)
 
         self.addMapping()
 
-    def addMapping(self):
-        self._dataMapper.addMapping(self.uiX, 2)
-        self._dataMapper.addMapping(self.uiY, 3)
-        self._dataMapper.addMapping(self.uiZ, 4)
+
+registerEditor('light', LightEditor)
+registerEditor('camera', CameraEditor)
+registerEditor('transform', TransformEditor)
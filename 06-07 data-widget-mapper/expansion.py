@@ -0,0 +1,265 @@
+"""
+The expansion module handles expanding/collapsing whole subtrees of a tree
+view in one batch, and keeps the expansion state by node path so it
+survives model resets and filter changes
+
+the view only keeps the expanded state of the indexes it currently has,
+rows filtered out by the proxy lose it; the manager remembers the paths of
+the expanded nodes (see Node.path, relative to the root) and expands them
+again when the rows come back
+
+example:
+    expansion = ExpansionManager(treeView)
+    expansion.expandToDepth(2)
+    state = expansion.saveState()
+    ...
+    expansion.restoreState(state)
+"""
+
+import contextlib
+
+from Qt import QtCore
+
+import node
+
+
+class ExpansionManager(QtCore.QObject):
+    def __init__(self, view, parent=None):
+        """
+        Initialization, the view must already have its model set, which is
+        either a SceneGraphModel or proxies of one
+
+        :param view: QTreeView. view to manage the expansion of
+        :param parent: QObject. parent object, the view by default
+        """
+        super(ExpansionManager, self).__init__(parent or view)
+        self._view = view
+        self._expandedPaths = set()
+        self._batching = False
+
+        # rows come back in several signals (e.g. one per parent when
+        # filtering), restoring is done once after all of them
+        self._restoreTimer = QtCore.QTimer(self)
+        self._restoreTimer.setSingleShot(True)
+        self._restoreTimer.setInterval(0)
+        self._restoreTimer.timeout.connect(self.restore)
+
+        view.expanded.connect(self._onExpanded)
+        view.collapsed.connect(self._onCollapsed)
+
+        model = view.model()
+        model.modelReset.connect(self._restoreTimer.start)
+        model.layoutChanged.connect(self._restoreTimer.start)
+        model.rowsInserted.connect(self._restoreTimer.start)
+
+    # ------------ Index <-> Node ---------------#
+
+    def _proxies(self):
+        proxies = list()
+        model = self._view.model()
+        while isinstance(model, QtCore.QAbstractProxyModel):
+            proxies.append(model)
+            model = model.sourceModel()
+        return proxies, model
+
+    def _toSource(self, index):
+        proxies, sourceModel = self._proxies()
+        for proxy in proxies:
+            index = proxy.mapToSource(index)
+        return index
+
+    def _fromSource(self, index):
+        proxies, sourceModel = self._proxies()
+        for proxy in reversed(proxies):
+            index = proxy.mapFromSource(index)
+        return index
+
+    def nodeForIndex(self, index):
+        """
+        :param index: QModelIndex. index of the view's model
+        :return: Node. node of the index, the root node if invalid
+        """
+        proxies, sourceModel = self._proxies()
+        return sourceModel.getNode(self._toSource(index))
+
+    def indexForPath(self, path):
+        """
+        :param path: str. node path
+        :return: QModelIndex. index of the view's model, invalid if the node
+        doesn't exist or is filtered out
+        """
+        proxies, sourceModel = self._proxies()
+        currentNode = sourceModel.findByPath(path)
+        if currentNode is None:
+            return QtCore.QModelIndex()
+        return self._fromSource(sourceModel.indexForNode(currentNode))
+
+    def _indexesForPaths(self, paths, topNode=None):
+        """
+        Resolve many paths at once, walking down from the top node into the
+        nodes of the paths and their ancestors only: the rows are known from
+        the walk and every path is built from the path of its parent
+
+        :param paths: set. node paths
+        :param topNode: Node. node to walk down from, the root if None
+        :return: generator. (path, index of the view's model) of the paths
+        present in the view, parents before children
+        """
+        proxies, sourceModel = self._proxies()
+        if topNode is None:
+            topNode = sourceModel.getNode(QtCore.QModelIndex())
+
+        ancestors = set()
+        for path in paths:
+            parts = path.split(node.PATH_SEPARATOR)
+            for i in range(1, len(parts)):
+                ancestors.add(node.PATH_SEPARATOR.join(parts[:i]))
+
+        stack = [(topNode, topNode.path, sourceModel.indexForNode(topNode))]
+        while stack:
+            currentNode, path, sourceIndex = stack.pop()
+            for row, child in enumerate(currentNode._children):
+                childPath = node.joinPath(path, child.name)
+                if childPath not in paths and childPath not in ancestors:
+                    continue
+                childIndex = sourceModel.index(row, 0, sourceIndex)
+                index = childIndex
+                for proxy in reversed(proxies):
+                    index = proxy.mapFromSource(index)
+                # filtered out along with its subtree
+                if not index.isValid():
+                    continue
+                if childPath in paths:
+                    yield childPath, index
+                stack.append((child, childPath, childIndex))
+
+    # ------------ Batch expand/collapse ---------------#
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context suspending the painting of the view while expanding many
+        indexes, the layout is done once when the painting is resumed
+        """
+        if self._batching:
+            yield
+            return
+
+        self._batching = True
+        self._view.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self._view.setUpdatesEnabled(True)
+            self._batching = False
+
+    def expandToDepth(self, depth, index=QtCore.QModelIndex()):
+        """
+        Expand the subtree of the index down to the given depth
+
+        :param depth: int. levels to expand, 0 expands only the index (or
+        the top level items without index), -1 expands everything
+        :param index: QModelIndex. top of the subtree, the whole tree if
+        invalid
+        """
+        with self.batch():
+            if not index.isValid():
+                if depth < 0:
+                    self._view.expandAll()
+                else:
+                    # the view collapses everything deeper than the depth
+                    self._view.expandToDepth(depth)
+                    self._expandedPaths = set()
+                topNodes = self.nodeForIndex(index)._children
+            else:
+                if hasattr(self._view, 'expandRecursively'):
+                    self._view.expandRecursively(index, depth)
+                else:
+                    self._expandLoop(index, depth)
+                topNodes = [self.nodeForIndex(index)]
+
+            # the paths are built down from the top nodes
+            stack = [(topNode, topNode.path, 0) for topNode in topNodes]
+            while stack:
+                currentNode, path, level = stack.pop()
+                if 0 <= depth < level or not currentNode.childCount:
+                    continue
+                self._expandedPaths.add(path)
+                stack.extend(
+                    (child, node.joinPath(path, child.name), level + 1)
+                    for child in currentNode._children)
+
+    def _expandLoop(self, index, depth):
+        model = self._view.model()
+        stack = [(index, 0)]
+        while stack:
+            current, level = stack.pop()
+            if 0 <= depth < level:
+                continue
+            self._view.setExpanded(current, True)
+            for row in range(model.rowCount(current)):
+                stack.append((model.index(row, 0, current), level + 1))
+
+    def collapseAll(self, index=QtCore.QModelIndex()):
+        """
+        Collapse the subtree of the index, only the expanded indexes are
+        visited
+
+        :param index: QModelIndex. top of the subtree, the whole tree if
+        invalid
+        """
+        with self.batch():
+            if not index.isValid():
+                self._view.collapseAll()
+                self._expandedPaths = set()
+                return
+
+            topNode = self.nodeForIndex(index)
+            prefix = topNode.path
+            paths = set(path for path in self._expandedPaths
+                        if path == prefix
+                        or path.startswith(prefix + node.PATH_SEPARATOR))
+            self._expandedPaths -= paths
+            self._view.setExpanded(index, False)
+            for path, current in self._indexesForPaths(paths, topNode):
+                self._view.setExpanded(current, False)
+
+    # ------------ State ---------------#
+
+    def _onExpanded(self, index):
+        # the batches record the paths themselves, the view may report
+        # leaves as expanded too
+        if self._batching:
+            return
+        self._expandedPaths.add(self.nodeForIndex(index).path)
+
+    def _onCollapsed(self, index):
+        if self._batching:
+            return
+        self._expandedPaths.discard(self.nodeForIndex(index).path)
+
+    def saveState(self):
+        """
+        :return: set. paths of the expanded nodes
+        """
+        return set(self._expandedPaths)
+
+    def restoreState(self, state):
+        """
+        Expand the nodes of the saved paths
+
+        :param state: set. paths returned by saveState()
+        """
+        self._expandedPaths = set(state)
+        self.restore()
+
+    def restore(self):
+        """
+        Expand again all the remembered paths present in the view, parents
+        before children
+        """
+        self._restoreTimer.stop()
+        with self.batch():
+            for path, index in self._indexesForPaths(self._expandedPaths):
+                if not self._view.isExpanded(index):
+                    self._view.setExpanded(index, True)
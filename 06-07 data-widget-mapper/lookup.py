@@ -0,0 +1,118 @@
+"""
+The lookup module keeps a name and path index of the scene graph, so a node
+can be found directly instead of walking the children recursively or
+filtering the view with a regular expression
+
+The index is maintained by SceneGraphModel: renaming through setData() on
+column 0 and inserting/removing rows keep it up to date. Editing the nodes
+directly (e.g. Node.name) bypasses the model and requires a rebuild()
+"""
+
+import bisect
+
+import node
+
+
+class SceneLookup(object):
+    def __init__(self, root):
+        """
+        Initialization
+
+        :param root: Node. root node of the scene to index
+        """
+        self._root = root
+        self._byPath = dict()
+        self._byName = dict()
+        self._sortedPaths = None
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Re-index the whole scene from the root
+        """
+        self._byPath = dict()
+        self._byName = dict()
+        self._sortedPaths = None
+        self.addSubtree(self._root)
+
+    def addSubtree(self, root):
+        """
+        Index the given node and all of its descendants
+
+        :param root: Node. top node of the subtree
+        """
+        stack = [(root, root.path)]
+        while stack:
+            current, path = stack.pop()
+            self._byPath.setdefault(path, list()).append(current)
+            self._byName.setdefault(current.name, list()).append(current)
+            for child in current._children:
+                stack.append((child, node.joinPath(path, child.name)))
+        self._sortedPaths = None
+
+    def removeSubtree(self, root):
+        """
+        Remove the given node and all of its descendants from the index, has
+        to be called before the node is renamed or detached
+
+        :param root: Node. top node of the subtree
+        """
+        stack = [(root, root.path)]
+        while stack:
+            current, path = stack.pop()
+            self._discard(self._byPath, path, current)
+            self._discard(self._byName, current.name, current)
+            for child in current._children:
+                stack.append((child, node.joinPath(path, child.name)))
+        self._sortedPaths = None
+
+    @staticmethod
+    def _discard(table, key, value):
+        nodes = table.get(key)
+        if not nodes:
+            return
+        for i, current in enumerate(nodes):
+            if current is value:
+                del nodes[i]
+                break
+        if not nodes:
+            del table[key]
+
+    def findByPath(self, path):
+        """
+        :param path: str. full path of the node from the root, e.g.
+        "Hips/RightPirateLeg", see Node.path
+        :return: Node. first node of the given path, None if not found
+        """
+        nodes = self._byPath.get(path)
+        if nodes:
+            return nodes[0]
+        return None
+
+    def findByName(self, name):
+        """
+        :param name: str. node name
+        :return: list. all the nodes of the given name
+        """
+        return list(self._byName.get(name, ()))
+
+    def findByPrefix(self, prefix):
+        """
+        Find all nodes of which the path starts with the prefix, the sorted
+        paths are cached until the next edit
+
+        :param prefix: str. beginning of the path, e.g. "Hips" matches
+        "Hips", "Hips/RightPirateLeg"... (and "HipsTwist")
+        :return: list. matching nodes ordered by path
+        """
+        if self._sortedPaths is None:
+            self._sortedPaths = sorted(self._byPath)
+
+        paths = self._sortedPaths
+        nodes = list()
+        start = bisect.bisect_left(paths, prefix)
+        for path in paths[start:]:
+            if not path.startswith(prefix):
+                break
+            nodes.extend(self._byPath[path])
+        return nodes
@@ -2,11 +2,44 @@
 This model is similar to previous lesson supporting our custom node, the only
 difference being the data() and setData() method lets the node to handle it
 internally
+
+every edit goes through the model's QUndoStack as a command (see the
+undoCommands module), so that changes made by the data mapper or the view
+can be undone; setting a value equal to the current one pushes nothing
+
+the columns of the model are the properties of all the node types merged
+together (see node.sceneColumns), so a column always means the same
+property whatever the node type; the tree only displays the first column
+unless the multi-column mode is turned on with setMultiColumn()
+
+sorting goes through sortRole, which returns a typed key per column; the
+keys of a column are extracted in one pass on the first sort and cached
+until dataChanged reports the node changed
 """
 
-from Qt import QtCore, QtGui
+from Qt import QtCore, QtGui, QtWidgets
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    # python 2
+    from collections import Sequence
 
+import lookup
 import node
+import undoCommands
+
+
+ICON_SIZE = 16
+ROW_PADDING = 4
+SECTION_WIDTH = 150
+
+STRING_TYPES = (str, bytes, type(u''))
+
+
+def _noValue(currentNode):
+    # getter of the columns a node type doesn't declare
+    return None
 
 
 class SceneGraphModel(QtCore.QAbstractItemModel):
@@ -16,6 +49,53 @@ class SceneGraphModel(QtCore.QAbstractItemModel):
     def __init__(self, root, parent=None):
         super(SceneGraphModel, self).__init__(parent)
         self._rootNode = root
+        self._undoStack = QtWidgets.QUndoStack(self)
+        self._lookup = lookup.SceneLookup(root)
+
+        self._columns = node.sceneColumns()
+        self._columnIndex = dict(
+            (column.attr, i) for i, column in enumerate(self._columns))
+        self._multiColumn = False
+
+        # node class -> model column to node column
+        self._columnMaps = dict()
+        # node class -> getter of every model column, so reading a value is
+        # a single tuple lookup
+        self._columnGetters = dict()
+        # model column -> {node: sort key}
+        self._sortKeys = dict()
+        # node type -> size hint, every row of a type has the same size
+        self._sizeHints = dict()
+        # nodes edited together by setData(), see setEditGroup(); only the
+        # properties of the node types are, not the name every node has
+        self._editGroup = frozenset()
+        commonAttrs = set(column.attr for column in node.Node.COLUMNS)
+        self._groupColumns = frozenset(
+            i for i, column in enumerate(self._columns)
+            if column.attr not in commonAttrs)
+
+        self._roleHandlers = {
+            QtCore.Qt.DisplayRole: self._valueData,
+            QtCore.Qt.EditRole: self._valueData,
+            QtCore.Qt.DecorationRole: self._decorationData,
+            SceneGraphModel.sortRole: self._sortData,
+            SceneGraphModel.filterRole: self._typeData,
+            QtCore.Qt.SizeHintRole: self._sizeHintData,
+        }
+
+        # connected before any proxy, the outdated sort keys are dropped
+        # before the proxies re-sort
+        self.dataChanged.connect(self._onDataChanged)
+        self.rowsInserted.connect(self._onRowsInserted)
+        self.modelReset.connect(self._sortKeys.clear)
+
+    def undoStack(self):
+        """
+        Custom: the undo stack holding the edit history of the model
+
+        :return: QUndoStack. undo stack of the model
+        """
+        return self._undoStack
 
     def rowCount(self, parent):
         if not parent.isValid():
@@ -26,57 +106,315 @@ class SceneGraphModel(QtCore.QAbstractItemModel):
         return parentNode.childCount
 
     def columnCount(self, parent):
+        if self._multiColumn:
+            return len(self._columns)
         return 1
 
+    def setMultiColumn(self, enabled):
+        """
+        Custom: display every property as a column (table-tree), or only
+        the name column
+
+        :param enabled: bool. whether to display all the columns
+        """
+        if enabled == self._multiColumn:
+            return
+        self.beginResetModel()
+        self._multiColumn = enabled
+        self.endResetModel()
+
+    def columnForAttr(self, attr):
+        """
+        Custom: model column of the node property
+
+        :param attr: str. property name, e.g. 'intensity'
+        :return: int. column, -1 if no node type declares the property
+        """
+        return self._columnIndex.get(attr, -1)
+
+    def _compileColumns(self, nodeClass):
+        """
+        Build the column map and the getters of the model columns for the
+        node class, once per class
+
+        :param nodeClass: type. Node class
+        :return: tuple. getter of every model column
+        """
+        columnMap = tuple(
+            nodeClass.columnIndex(c.attr) for c in self._columns)
+        getters = tuple(nodeClass._getters[i] if i >= 0 else _noValue
+                        for i in columnMap)
+        self._columnMaps[nodeClass] = columnMap
+        self._columnGetters[nodeClass] = getters
+        return getters
+
+    def _nodeColumn(self, currentNode, column):
+        columnMap = self._columnMaps.get(currentNode.__class__)
+        if columnMap is None:
+            self._compileColumns(currentNode.__class__)
+            columnMap = self._columnMaps[currentNode.__class__]
+        if 0 <= column < len(columnMap):
+            return columnMap[column]
+        return -1
+
+    def nodeData(self, currentNode, column):
+        """
+        Custom: value of the node property of the model column
+
+        :param currentNode: Node. node to read
+        :param column: int. model column
+        :return: value of the property, None if the node doesn't have it
+        """
+        getters = self._columnGetters.get(currentNode.__class__)
+        if getters is None:
+            getters = self._compileColumns(currentNode.__class__)
+        if 0 <= column < len(getters):
+            return getters[column](currentNode)
+        return None
+
     def data(self, index, role):
         """
         Override: due to the complexity of the Node type, it is better to pass
         the value for the Node to return data() for display internally
+
+        the role is resolved through a dispatch table built once in the
+        initialization instead of an if-chain
         """
         if not index.isValid():
             return None
 
-        currentNode = index.internalPointer()
-        if role == QtCore.Qt.DisplayRole or role == QtCore.Qt.EditRole:
-            # not all column needs to be displayed in the view, more columns
-            # can store different types of data of the node, and they can be
-            # accessed in other places; in our case, dataWidgetMapper maps
-            # data from multiple columns on multiple ui elements for display
-            return currentNode.data(index.column())
- 
-        if role == QtCore.Qt.DecorationRole:
-            if index.column() == 0:
-                return currentNode.icon
-            
-        if role == SceneGraphModel.sortRole:
-            return currentNode.type
+        handler = self._roleHandlers.get(role)
+        if handler is not None:
+            return handler(index.internalPointer(), index.column())
+        return None
+
+    def _valueData(self, currentNode, column):
+        # not all column needs to be displayed in the view, more columns
+        # can store different types of data of the node, and they can be
+        # accessed in other places; in our case, dataWidgetMapper maps
+        # data from multiple columns on multiple ui elements for display;
+        # the column of a valid index is always a model column
+        getters = self._columnGetters.get(currentNode.__class__)
+        if getters is None:
+            getters = self._compileColumns(currentNode.__class__)
+        return getters[column](currentNode)
+
+    def _decorationData(self, currentNode, column):
+        if column == 0:
+            return currentNode.icon
+        return None
 
-        if role == SceneGraphModel.filterRole:
-            return currentNode.type
+    def _typeData(self, currentNode, column):
+        return currentNode.type
+
+    def _sizeHintData(self, currentNode, column):
+        """
+        The size of the rows only depends on the node type (with or without
+        icon), it is measured once per type so the views don't measure the
+        icon and text of every row
+        """
+        size = self._sizeHints.get(currentNode.type)
+        if size is None:
+            metrics = QtGui.QFontMetrics(QtGui.QGuiApplication.font())
+            height = metrics.height()
+            if currentNode.icon is not None:
+                height = max(height, ICON_SIZE)
+            size = QtCore.QSize(SECTION_WIDTH, height + ROW_PADDING)
+            self._sizeHints[currentNode.type] = size
+        return size
+
+    def _sortData(self, currentNode, column):
+        keys = self._sortKeys.get(column)
+        if keys is None:
+            keys = self._extractSortKeys(column)
+
+        key = keys.get(currentNode)
+        if key is None:
+            # nodes inserted after the extraction
+            key = self._sortKey(currentNode, column)
+            keys[currentNode] = key
+        return key
+
+    def _sortKey(self, currentNode, column):
+        if not 0 <= column < len(self._columns):
+            return ''
+        value = self.nodeData(currentNode, column)
+        return self._columns[column].sortKey(value)
+
+    def _extractSortKeys(self, column):
+        """
+        Compute the sort keys of the column for the whole scene in one pass
+        """
+        keys = dict()
+        for currentNode, depth in self._rootNode.walk():
+            keys[currentNode] = self._sortKey(currentNode, column)
+        self._sortKeys[column] = keys
+        return keys
+
+    def _onDataChanged(self, topLeft, bottomRight, roles=()):
+        """
+        Drop the cached sort keys of the changed rows and columns
+        """
+        parentNode = self.getNode(topLeft.parent())
+        for column in range(topLeft.column(), bottomRight.column() + 1):
+            keys = self._sortKeys.get(column)
+            if not keys:
+                continue
+            for row in range(topLeft.row(), bottomRight.row() + 1):
+                keys.pop(parentNode.child(row), None)
+
+    def _onRowsInserted(self, parent, first, last):
+        """
+        Drop the cached sort keys of the inserted subtrees, nodes inserted
+        again (e.g. by undo) may have changed while detached
+        """
+        if not self._sortKeys:
+            return
+        parentNode = self.getNode(parent)
+        for row in range(first, last + 1):
+            for currentNode, depth in parentNode.child(row).walk():
+                for keys in self._sortKeys.values():
+                    keys.pop(currentNode, None)
 
     def setData(self, index, value, role=QtCore.Qt.EditRole):
         """
         Override: due to the complexity of the Node type, it is better to pass
         the value for the Node to handle setData() for editing internally
+
+        editing a property of a node of the edit group edits the whole group
+        at once, renaming only renames the node
         """
         if index.isValid():
             currentNode = index.internalPointer()
             if role == QtCore.Qt.EditRole:
-                currentNode.setData(index.column(), value)
-                self.dataChanged.emit(index, index)
+                column = index.column()
+                # committing an editor without changing its value neither
+                # fills the history nor spreads the value over the group
+                if value == self.nodeData(currentNode, column):
+                    return True
+                if (len(self._editGroup) > 1 and column in self._groupColumns
+                        and currentNode in self._editGroup):
+                    return self.setValues(self._editGroup, column, value)
+
+                self._undoStack.push(undoCommands.SetDataCommand(
+                    self, currentNode, column, value))
                 return True
             
         return False
 
+    def setEditGroup(self, nodes):
+        """
+        Custom: nodes edited together, an edit of one of them through
+        setData() (e.g. by the property editors) is applied to all the
+        nodes of the group having the property
+
+        :param nodes: iterable. nodes of the group, e.g. the selected ones
+        """
+        self._editGroup = frozenset(nodes)
+
+    def setValues(self, nodes, column, values, perNode=None):
+        """
+        Custom: edit the property of many nodes as one undo command, the
+        nodes without the property are skipped
+
+        :param nodes: iterable. nodes to be edited
+        :param column: int. model column of the property
+        :param values: one value per node, or one value set on every node
+        :param perNode: bool. whether the values are one per node, by
+        default any sequence but a string is (e.g. list, tuple, array); pass
+        True for other iterables such as generators or numpy arrays
+        :return: bool. whether any node was edited
+        :raise ValueError: when the number of values doesn't match the nodes
+        """
+        nodes = list(nodes)
+        if perNode is None:
+            perNode = (isinstance(values, Sequence)
+                       and not isinstance(values, STRING_TYPES))
+        if not perNode:
+            values = [values] * len(nodes)
+        else:
+            values = list(values)
+            if len(values) != len(nodes):
+                raise ValueError('{} values for {} nodes'.format(
+                    len(values), len(nodes)))
+
+        pairs = [
+            (currentNode, value) for currentNode, value in zip(nodes, values)
+            if currentNode.isEditable(self._nodeColumn(currentNode, column))
+        ]
+        if not pairs:
+            return False
+
+        self._undoStack.push(undoCommands.SetValuesCommand(
+            self, [pair[0] for pair in pairs], column,
+            [pair[1] for pair in pairs]))
+        return True
+
+    def applyData(self, currentNode, column, value):
+        """
+        Custom: set the value of a node directly and notify the views, used
+        by the undo commands for both redo and undo
+
+        :param currentNode: Node. node to be edited
+        :param column: int. column of the property
+        :param value: QVariant. value of the property
+        """
+        self.applyValues([currentNode], column, [value])
+
+    def applyValues(self, nodes, column, values):
+        """
+        Custom: set the values of many nodes directly, dataChanged() is
+        emitted once per parent for the range of the edited rows
+
+        :param nodes: list. nodes to be edited
+        :param column: int. column of the property
+        :param values: list. value of each node
+        """
+        renaming = column == self.columnForAttr('name')
+        for currentNode, value in zip(nodes, values):
+            nodeColumn = self._nodeColumn(currentNode, column)
+            if renaming:
+                # renaming changes the path of the whole subtree
+                self._lookup.removeSubtree(currentNode)
+                currentNode.setData(nodeColumn, value)
+                self._lookup.addSubtree(currentNode)
+            else:
+                currentNode.setData(nodeColumn, value)
+
+        self._emitDataChanged(nodes, column)
+
+    def _emitDataChanged(self, nodes, column):
+        if len(nodes) == 1:
+            index = self.createIndex(nodes[0].row, column, nodes[0])
+            self.dataChanged.emit(index, index)
+            return
+
+        # parent -> edited children, the rows of the siblings are looked up
+        # once per parent instead of once per node
+        groups = dict()
+        for currentNode in nodes:
+            groups.setdefault(currentNode.parent, set()).add(currentNode)
+
+        for parentNode, children in groups.items():
+            rows = [row for row, child in enumerate(parentNode._children)
+                    if child in children]
+            first, last = rows[0], rows[-1]
+            self.dataChanged.emit(
+                self.createIndex(first, column, parentNode.child(first)),
+                self.createIndex(last, column, parentNode.child(last)))
+
     def headerData(self, section, orientation, role):
         if role == QtCore.Qt.DisplayRole:
-            if section == 0:
-                return "Scene Graph"
-            else:
-                return "Type Info"
+            if 0 <= section < len(self._columns):
+                return self._columns[section].header
 
     def flags(self, index):
-        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        currentNode = self.getNode(index)
+        nodeColumn = self._nodeColumn(currentNode, index.column())
+        if currentNode.isEditable(nodeColumn):
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
 
     def parent(self, index):
         currentNode = self.getNode(index)
@@ -105,33 +443,110 @@ class SceneGraphModel(QtCore.QAbstractItemModel):
                 return currentNode
         return self._rootNode
 
+    def indexForNode(self, currentNode):
+        """
+        Custom method, the reverse of getNode()
+
+        :param currentNode: Node. node to get the index from
+        :return: QModelIndex. index of the node, invalid for the root
+        """
+        if currentNode is None or currentNode is self._rootNode:
+            return QtCore.QModelIndex()
+        return self.createIndex(currentNode.row, 0, currentNode)
+
+    def findByPath(self, path):
+        """
+        Custom: find a node by its full path, see SceneLookup
+
+        :param path: str. full path from the root (which isn't part of it),
+        e.g. "Hips/RightPirateLeg", see Node.path
+        :return: Node. node of the path, None if not found
+        """
+        return self._lookup.findByPath(path)
+
+    def findByName(self, name):
+        """
+        Custom: find all nodes of the given name
+
+        :param name: str. node name
+        :return: list. nodes of the given name
+        """
+        return self._lookup.findByName(name)
+
+    def findByPrefix(self, prefix):
+        """
+        Custom: find all nodes of which the path starts with the prefix
+
+        :param prefix: str. beginning of the path from the root, e.g. "Hips"
+        :return: list. matching nodes ordered by path
+        """
+        return self._lookup.findByPrefix(prefix)
+
     def insertRows(self, position, rows, parent=QtCore.QModelIndex()):
         parentNode = self.getNode(parent)
-        self.beginInsertRows(parent, position, position + rows - 1)
-        for row in range(rows):
-            childCount = parentNode.childCount()
-            childNode = node.Node("untitled" + str(childCount))
-            parentNode.insertChild(position, childNode)
-
-        self.endInsertRows()
+        childCount = parentNode.childCount
+        nodes = [
+            node.Node("untitled" + str(childCount + row))
+            for row in range(rows)
+        ]
+        self._undoStack.push(undoCommands.InsertNodesCommand(
+            self, parentNode, position, nodes))
         return True
     
     def insertLights(self, position, rows, parent=QtCore.QModelIndex()):
         parentNode = self.getNode(parent)
-        self.beginInsertRows(parent, position, position + rows - 1)
-        for row in range(rows):
-            childCount = parentNode.childCount()
-            childNode = node.LightNode("light" + str(childCount))
-            parentNode.insertChild(position, childNode)
-        
-        self.endInsertRows()
+        childCount = parentNode.childCount
+        nodes = [
+            node.LightNode("light" + str(childCount + row))
+            for row in range(rows)
+        ]
+        self._undoStack.push(undoCommands.InsertNodesCommand(
+            self, parentNode, position, nodes))
         return True
 
     def removeRows(self, position, rows, parent=QtCore.QModelIndex()):
         parentNode = self.getNode(parent)
+        self._undoStack.push(undoCommands.RemoveNodesCommand(
+            self, parentNode, position, rows))
+        return True
+
+    def insertNodes(self, parentNode, position, nodes):
+        """
+        Custom: insert existing nodes under the parent node, used by the
+        undo commands
+
+        :param parentNode: Node. node to insert the children under
+        :param position: int. row position to insert
+        :param nodes: list. nodes to be inserted
+        """
+        parent = self.indexForNode(parentNode)
+        self.beginInsertRows(parent, position, position + len(nodes) - 1)
+        for row, childNode in enumerate(nodes):
+            parentNode.insertChild(position + row, childNode)
+            self._lookup.addSubtree(childNode)
+
+        self.endInsertRows()
+
+    def takeNodes(self, parentNode, position, rows):
+        """
+        Custom: detach children from the parent node without destroying
+        them, used by the undo commands
+
+        :param parentNode: Node. node to remove the children from
+        :param position: int. starting row position to remove
+        :param rows: int. number of rows to remove
+        :return: list. the detached nodes along with their subtrees
+        """
+        parent = self.indexForNode(parentNode)
         self.beginRemoveRows(parent, position, position + rows - 1)
+        nodes = [parentNode.child(position + row) for row in range(rows)]
+        for childNode in nodes:
+            self._lookup.removeSubtree(childNode)
+            for currentNode, depth in childNode.walk():
+                for keys in self._sortKeys.values():
+                    keys.pop(currentNode, None)
         for row in range(rows):
             parentNode.removeChild(position)
 
         self.endRemoveRows()
-        return True
+        return nodes
@@ -0,0 +1,332 @@
+"""
+The model server shares one SceneGraphModel with several tool processes
+over a local socket (a unix domain socket, or a named pipe on windows),
+the same way the first lesson shares one model between a list view and a
+combo box, but across processes
+
+the server owns the model and publishes its changes; the clients mirror it
+with a RemoteSceneModel (see remoteModel module) which only holds the rows
+that have been fetched by its views
+
+protocol: every message is a frame made of a 4 bytes big endian length
+followed by the zlib compressed json of a list of operations, the
+operations are lists starting with their name:
+
+    server -> client
+        ['reset', revision, childCount]         the whole model changed
+        ['set', rows, column, value]            a value changed
+        ['insert', revision, rows, first, [summary...]]
+                                                rows inserted under rows
+        ['remove', revision, rows, first, last] rows removed under rows
+        ['children', rows, [summary...]]        answer of a fetch
+        ['stale', name, revision, rows]         request rejected
+
+    client -> server
+        ['fetch', revision, rows]               children of the node
+        ['setData', revision, rows, column, value]
+                                                edit through the undo stack
+
+rows is the list of the row numbers from the root to the node, a summary
+is [type, childCount, values] with the values of all the model columns
+
+the revision counts the operations sent to a client which move rows
+(reset, insert, remove); a request carries the revision of the rows it was
+made on, and is rejected as stale when the server has sent such operations
+the client hadn't applied yet, since its rows may designate another node
+by then
+
+the changes are queued per client and flushed in one frame per interval,
+consecutive edits of the same value only send the newest one, and a client
+only receives the changes of the rows it displays: the children of the rows
+it has fetched
+
+example:
+    server = SceneModelServer(sceneGraphModel)
+    server.listen('sceneGraphModel')
+"""
+
+import json
+import struct
+import sys
+import zlib
+
+from Qt import QtCore, QtNetwork, QtWidgets
+
+import node
+
+
+SERVER_NAME = 'sceneGraphModel'
+FLUSH_INTERVAL = 16
+HEADER = struct.Struct('>I')
+
+# operations moving the rows of the nodes, see the revision above
+STRUCTURE_OPERATIONS = frozenset(['reset', 'insert', 'remove'])
+
+
+def encodeFrame(operations):
+    """
+    :param operations: list. operations to be sent together
+    :return: bytes. length prefixed compressed frame
+    """
+    payload = zlib.compress(json.dumps(operations).encode('utf-8'))
+    return HEADER.pack(len(payload)) + payload
+
+
+class FrameReader(object):
+    """
+    Accumulate the bytes read from a socket and split them into frames
+    """
+    def __init__(self):
+        self._buffer = b''
+
+    def feed(self, data):
+        """
+        :param data: bytes. bytes read from the socket
+        :return: list. operation lists of the completed frames
+        """
+        self._buffer += data
+        frames = list()
+        while len(self._buffer) >= HEADER.size:
+            size, = HEADER.unpack(self._buffer[:HEADER.size])
+            end = HEADER.size + size
+            if len(self._buffer) < end:
+                break
+            payload = zlib.decompress(self._buffer[HEADER.size:end])
+            frames.append(json.loads(payload.decode('utf-8')))
+            self._buffer = self._buffer[end:]
+        return frames
+
+
+class _Client(object):
+    def __init__(self, socket, rootNode):
+        self.socket = socket
+        self.reader = FrameReader()
+        # nodes of which the client has fetched the children
+        self.fetched = set([rootNode])
+        self.pending = list()
+        # (rows, column) -> position of the set operation in pending
+        self.pendingSets = dict()
+        # structure operations queued to the client
+        self.revision = 0
+
+    def queueStructure(self, name, *args):
+        """
+        Queue an operation moving rows, stamped with the next revision
+        """
+        self.revision += 1
+        self.queue([name, self.revision] + list(args))
+
+    def queue(self, operation):
+        if operation[0] == 'set':
+            key = (tuple(operation[1]), operation[2])
+            position = self.pendingSets.get(key)
+            if position is not None:
+                self.pending[position] = operation
+                return
+            self.pendingSets[key] = len(self.pending)
+        else:
+            # rows of the queued values may shift after this operation
+            self.pendingSets = dict()
+        self.pending.append(operation)
+
+    def flush(self):
+        if self.pending:
+            self.socket.write(encodeFrame(self.pending))
+            self.pending = list()
+            self.pendingSets = dict()
+
+
+class SceneModelServer(QtCore.QObject):
+    def __init__(self, model, parent=None):
+        """
+        Initialization
+
+        :param model: SceneGraphModel. model shared with the clients
+        :param parent: QObject. parent object
+        """
+        super(SceneModelServer, self).__init__(parent)
+        self._model = model
+        self._clients = dict()
+        self._columnCount = len(node.sceneColumns())
+
+        self._server = QtNetwork.QLocalServer(self)
+        self._server.newConnection.connect(self._onNewConnection)
+
+        self._flushTimer = QtCore.QTimer(self)
+        self._flushTimer.setSingleShot(True)
+        self._flushTimer.setInterval(FLUSH_INTERVAL)
+        self._flushTimer.timeout.connect(self.flush)
+
+        model.dataChanged.connect(self._onDataChanged)
+        model.rowsInserted.connect(self._onRowsInserted)
+        model.rowsAboutToBeRemoved.connect(self._onRowsAboutToBeRemoved)
+        model.rowsRemoved.connect(self._onRowsRemoved)
+        model.modelReset.connect(self._onModelReset)
+
+    def listen(self, name=SERVER_NAME):
+        """
+        Start accepting clients, a socket left over by a crashed server of
+        the same name is removed first
+
+        :param name: str. name of the local socket
+        :return: bool. whether the server is listening
+        """
+        QtNetwork.QLocalServer.removeServer(name)
+        return self._server.listen(name)
+
+    def clientCount(self):
+        return len(self._clients)
+
+    def _rootNode(self):
+        return self._model.getNode(QtCore.QModelIndex())
+
+    def _summary(self, currentNode):
+        values = [self._model.nodeData(currentNode, column)
+                  for column in range(self._columnCount)]
+        return [currentNode.type, currentNode.childCount, values]
+
+    # ------------ Connections ---------------#
+
+    def _onNewConnection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            client = _Client(socket, self._rootNode())
+            self._clients[socket] = client
+            socket.readyRead.connect(
+                lambda socket=socket: self._onReadyRead(socket))
+            socket.disconnected.connect(
+                lambda socket=socket: self._onDisconnected(socket))
+
+            client.queueStructure('reset', self._rootNode().childCount)
+            client.flush()
+
+    def _onDisconnected(self, socket):
+        self._clients.pop(socket, None)
+        socket.deleteLater()
+
+    def _onReadyRead(self, socket):
+        client = self._clients.get(socket)
+        if client is None:
+            return
+        for operations in client.reader.feed(bytes(socket.readAll())):
+            for operation in operations:
+                self._handle(client, operation)
+
+    def _findNode(self, rows):
+        currentNode = self._rootNode()
+        for row in rows:
+            if not 0 <= row < currentNode.childCount:
+                return None
+            currentNode = currentNode.child(row)
+        return currentNode
+
+    def _handle(self, client, operation):
+        name, revision, rows = operation[:3]
+        if revision != client.revision:
+            # made before rows moved, the rows may be another node's now
+            client.queue(['stale', name, revision, rows])
+            client.flush()
+            return
+
+        currentNode = self._findNode(rows)
+        if currentNode is None:
+            return
+
+        if name == 'fetch':
+            client.fetched.add(currentNode)
+            children = [self._summary(child)
+                        for child in currentNode._children]
+            # the queued changes happened before the answer, they are sent
+            # first so the client never applies them twice
+            client.queue(['children', rows, children])
+            client.flush()
+        elif name == 'setData':
+            column, value = operation[3], operation[4]
+            index = self._model.indexForNode(currentNode)
+            self._model.setData(index.sibling(index.row(), column), value)
+
+    # ------------ Model changes ---------------#
+
+    def _publish(self, currentNode, operation):
+        """
+        Queue the operation for the clients displaying the node, which are
+        the ones that fetched its parent; the structure operations get the
+        revision of each client
+        """
+        parentNode = currentNode.parent
+        for client in self._clients.values():
+            if parentNode is None or parentNode in client.fetched:
+                if operation[0] in STRUCTURE_OPERATIONS:
+                    client.queueStructure(*operation)
+                else:
+                    client.queue(operation)
+        if not self._flushTimer.isActive():
+            self._flushTimer.start()
+
+    def _onDataChanged(self, topLeft, bottomRight, roles=()):
+        parentNode = self._model.getNode(topLeft.parent())
+        for row in range(topLeft.row(), bottomRight.row() + 1):
+            currentNode = parentNode.child(row)
+            rows = node.rowPath(currentNode)
+            for column in range(topLeft.column(), bottomRight.column() + 1):
+                self._publish(currentNode, [
+                    'set', rows, column,
+                    self._model.nodeData(currentNode, column)])
+
+    def _onRowsInserted(self, parent, first, last):
+        parentNode = self._model.getNode(parent)
+        children = [self._summary(parentNode.child(row))
+                    for row in range(first, last + 1)]
+        self._publish(parentNode, [
+            'insert', node.rowPath(parentNode), first, children])
+
+    def _onRowsAboutToBeRemoved(self, parent, first, last):
+        """
+        Forget the removed nodes fetched by the clients, only the children
+        of a fetched node can have been fetched
+        """
+        parentNode = self._model.getNode(parent)
+        for client in self._clients.values():
+            stack = [parentNode.child(row) for row in range(first, last + 1)]
+            while stack:
+                currentNode = stack.pop()
+                if currentNode in client.fetched:
+                    client.fetched.discard(currentNode)
+                    stack.extend(currentNode._children)
+
+    def _onRowsRemoved(self, parent, first, last):
+        parentNode = self._model.getNode(parent)
+        self._publish(parentNode, [
+            'remove', node.rowPath(parentNode), first, last])
+
+    def _onModelReset(self):
+        rootNode = self._rootNode()
+        for client in self._clients.values():
+            client.fetched = set([rootNode])
+            client.pending = list()
+            client.pendingSets = dict()
+            client.queueStructure('reset', rootNode.childCount)
+        self.flush()
+
+    def flush(self):
+        """
+        Send the queued changes, one frame per client
+        """
+        self._flushTimer.stop()
+        for client in self._clients.values():
+            client.flush()
+
+
+if __name__ == '__main__':
+    import view
+
+    app = QtWidgets.QApplication(sys.argv)
+    wnd = view.MainWindow()
+    wnd.show()
+
+    server = SceneModelServer(wnd._model, wnd)
+    name = sys.argv[1] if len(sys.argv) > 1 else SERVER_NAME
+    if not server.listen(name):
+        sys.exit('could not listen on {}'.format(name))
+
+    sys.exit(app.exec_())
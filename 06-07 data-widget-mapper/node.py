@@ -3,16 +3,68 @@ The node module is for creating node data structure/class that supports
 hierarchical model. Each node object reflects to an abstract item which
 has child and parent relationships; Different types of node also has its
 own custom properties
+
+Scenes tend to repeat the same names and mostly keep their default values,
+so names are interned, the type and icon are shared per class, and default
+property values live on the class (flyweight): a node only stores a value
+of its own once it gets edited (copy-on-write)
+
+The properties exposed as model columns are declared per class as Column
+descriptors and compiled into dispatch tables by @compileColumns, so data()
+and setData() are one lookup instead of an if/elif chain through super()
+
+Traversals (log, xml export) are iterative rather than recursive, so deep
+hierarchies like long joint chains don't hit the recursion limit
 """
 
+import operator
 import os
+from collections import deque
 from enum import IntEnum, unique
 
-from Qt import QtGui, QtXml
+from Qt import QtCore, QtGui
 
 
 MODULE_PATH = os.path.dirname(os.path.abspath(__file__))
 ICON_PATH = os.path.join(MODULE_PATH, 'icons')
+PATH_SEPARATOR = '/'
+
+_ICON_CACHE = dict()
+
+try:
+    from sys import intern
+except ImportError:
+    # python 2 provides intern() as a builtin
+    pass
+
+
+def internString(value):
+    """
+    Return the shared copy of the given string so repeated names across the
+    scene only store one string object
+
+    :param value: str. string to intern
+    :return: str. interned string, or the value itself if not interned-able
+    """
+    try:
+        return intern(value)
+    except TypeError:
+        return value
+
+
+def loadIcon(fileName):
+    """
+    Return the icon of the given file name, created once and shared by all
+    the nodes using it
+
+    :param fileName: str. icon file name inside the icons folder
+    :return: QIcon. shared icon
+    """
+    icon = _ICON_CACHE.get(fileName)
+    if icon is None:
+        icon = QtGui.QIcon(QtGui.QPixmap(os.path.join(ICON_PATH, fileName)))
+        _ICON_CACHE[fileName] = icon
+    return icon
 
 
 @unique
@@ -24,29 +76,203 @@ class LightShapes(IntEnum):
     VOLUMETRIC = 4
 
 
+def toLightShape(value):
+    """
+    :param value: int or str. shape value or name, the undo history stores
+    the displayed shape name
+    :return: LightShapes. light shape
+    """
+    if value in LightShapes.__members__:
+        return LightShapes[value]
+    return LightShapes(value)
+
+
+class Column(object):
+    def __init__(self, attr, header=None, valueType=None, convert=None,
+                 editable=True, mapperProperty=None):
+        """
+        Declaration of a node property exposed as a model column
+
+        :param attr: str. property name on the node
+        :param header: str. header text of the column
+        :param valueType: type. type of the value, e.g. float
+        :param convert: callable. converts edited values before being set
+        :param editable: bool. whether the column can be edited
+        :param mapperProperty: bytes. widget property used by the data
+        mapper, None for the widget's user property
+        """
+        self.attr = attr
+        self.header = header or attr
+        self.valueType = valueType
+        self.convert = convert
+        self.editable = editable
+        self.mapperProperty = mapperProperty
+
+    def getter(self):
+        return operator.attrgetter(self.attr)
+
+    def sortKey(self, value):
+        """
+        Convert a value into a key of the same type for every node, so the
+        column can be sorted even when some nodes don't have the property
+
+        :param value: value of the property, None if the node doesn't have it
+        :return: float or str. sort key
+        """
+        if self.valueType in (bool, int, float):
+            if value is None:
+                return float('-inf')
+            return float(value)
+        if value is None:
+            return ''
+        return '{}'.format(value)
+
+    def setter(self):
+        if not self.editable:
+            return None
+
+        attr = self.attr
+        convert = self.convert
+        if convert is None:
+            return lambda node, value: setattr(node, attr, value)
+        return lambda node, value: setattr(node, attr, convert(value))
+
+
+def compileColumns(cls):
+    """
+    Class decorator compiling the COLUMNS declaration into the dispatch
+    tables used by data(), setData() and flags(); it has to decorate every
+    class declaring its own COLUMNS
+
+    :param cls: type. Node class
+    :return: type. the same class
+    """
+    cls._getters = tuple(column.getter() for column in cls.COLUMNS)
+    cls._setters = tuple(column.setter() for column in cls.COLUMNS)
+    cls._editable = tuple(column.editable for column in cls.COLUMNS)
+    cls._columnIndex = dict(
+        (column.attr, i) for i, column in enumerate(cls.COLUMNS))
+    return cls
+
+
+def joinPath(path, name):
+    """
+    :param path: str. path of a parent node, empty for the root
+    :param name: str. name of the child
+    :return: str. path of the child, see Node.path
+    """
+    if not path:
+        return name
+    return path + PATH_SEPARATOR + name
+
+
+def rowPath(currentNode):
+    """
+    :param currentNode: Node. node of a hierarchy
+    :return: list. row numbers from the root down to the node, every row
+    is looked up in the children of the parent (see Node.row), so this is
+    O(number of siblings) per level
+    """
+    rows = list()
+    while currentNode.parent is not None:
+        rows.append(currentNode.row)
+        currentNode = currentNode.parent
+    rows.reverse()
+    return rows
+
+
+def xmlValue(value):
+    """
+    :param value: value of a node property
+    :return: str. text of the value in the xml, formatted as
+    QDomElement.setAttribute() does: booleans as 1/0 and floats with 6
+    significant digits
+    """
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return '%g' % value
+    return '{}'.format(value)
+
+
+def xmlText(output):
+    """
+    :param output: QByteArray. document written by an auto-formatting
+    QXmlStreamWriter, without writeStartDocument()
+    :return: str. text of the document laid out as QDomDocument.toString():
+    the line break the writer puts before the first element is dropped and
+    the document ends with a line break
+    """
+    text = bytes(output).decode('utf-8')
+    if text.startswith('\n'):
+        text = text[1:]
+    return text + '\n'
+
+
+def writeXml(rootNode, writer):
+    """
+    Write the xml of a hierarchy one element at a time, the writing can be
+    paused between two nodes (see xmlExport module); the elements are
+    streamed in pre-order: whenever the next node is not deeper than the
+    last opened element, the elements in between are closed first
+
+    :param rootNode: Node or snapshot.FrozenNode. top of the hierarchy,
+    anything providing walk(), type and attrs()
+    :param writer: QXmlStreamWriter. writer to write the elements with
+    :return: generator. number of nodes written so far, after each node
+    """
+    openDepth = -1
+    count = 0
+    for current, depth in rootNode.walk():
+        while openDepth >= depth:
+            writer.writeEndElement()
+            openDepth -= 1
+
+        writer.writeStartElement(current.type)
+        if current is not rootNode:
+            for k, v in current.attrs().items():
+                writer.writeAttribute(k, xmlValue(v))
+        openDepth = depth
+        count += 1
+        yield count
+
+    while openDepth >= 0:
+        writer.writeEndElement()
+        openDepth -= 1
+
+
+@compileColumns
 class Node(object):
+    _type = 'node'
+    _iconFile = None
+
+    COLUMNS = (
+        Column('name', 'Scene Graph', str),
+        Column('type', 'Type Info', str, editable=False),
+    )
+
     def __init__(self, name, parent=None):
         super(Node, self).__init__()
-        self._name = name
+        self._name = internString(name)
         self._children = list()
         self._parent = parent
-        self._icon = None
-        self._type = 'node'
         
         if parent:
             parent.addChild(self)
 
     def log(self, tabLevel=-1):
-        output = ""
-        tabLevel += 1
-
-        output += "\t" * tabLevel
-        output += "|------{}\n".format(self._name)
+        return "".join(self.logLines(tabLevel))
 
-        for child in self._children:
-            output += child.log(tabLevel)
+    def logLines(self, tabLevel=-1):
+        """
+        Generate the lines of log() one by one, so very large hierarchies can
+        be streamed instead of built as one string
 
-        return output
+        :param tabLevel: int. indentation level of the parent
+        :return: generator. lines of the hierarchy
+        """
+        for current, depth in self.walk(tabLevel + 1):
+            yield "\t" * depth + "|------{}\n".format(current._name)
 
     def __repr__(self):
         return self.log()
@@ -61,7 +287,7 @@ class Node(object):
 
     @name.setter
     def name(self, value):
-        self._name = value
+        self._name = internString(value)
 
     @property
     def childCount(self):
@@ -77,60 +303,117 @@ class Node(object):
             return self.parent._children.index(self)
         return 0
 
+    @property
+    def path(self):
+        """
+        :return: str. full path of the node from the root, e.g.
+        "Hips/RightPirateLeg/RightPirateLeg_END"; the root itself isn't part
+        of the paths, its path is empty
+        """
+        names = list()
+        current = self
+        while current.parent is not None:
+            names.append(current.name)
+            current = current.parent
+        return PATH_SEPARATOR.join(reversed(names))
+
     @property
     def icon(self):
-        return self._icon
+        if self._iconFile:
+            return loadIcon(self._iconFile)
+        return None
+
+    # ------------ Traversal ---------------#
+
+    def walk(self, depth=0):
+        """
+        Iterate the hierarchy depth-first in pre-order (parent before its
+        children)
+
+        :param depth: int. depth given to the current node
+        :return: generator. (node, depth) pairs
+        """
+        stack = [(self, depth)]
+        while stack:
+            current, level = stack.pop()
+            yield current, level
+            stack.extend(
+                (child, level + 1) for child in reversed(current._children))
+
+    def walkPostOrder(self, depth=0):
+        """
+        Iterate the hierarchy depth-first in post-order (children before
+        their parent)
+
+        :param depth: int. depth given to the current node
+        :return: generator. (node, depth) pairs
+        """
+        stack = [(self, depth, False)]
+        while stack:
+            current, level, visited = stack.pop()
+            if visited:
+                yield current, level
+                continue
+            stack.append((current, level, True))
+            stack.extend((child, level + 1, False)
+                         for child in reversed(current._children))
+
+    def walkBreadthFirst(self, depth=0):
+        """
+        Iterate the hierarchy level by level
+
+        :param depth: int. depth given to the current node
+        :return: generator. (node, depth) pairs
+        """
+        queue = deque([(self, depth)])
+        while queue:
+            current, level = queue.popleft()
+            yield current, level
+            queue.extend((child, level + 1) for child in current._children)
 
     # ------------ XML Generation ---------------#
 
     def attrs(self):
         """
-        Parse class property list and values used for generating xml
+        Parse the column properties and values used for generating xml
 
         :return: dict. property names and values
         """
-        classes = self.__class__.__mro__
         kv = dict()
-        for cls in classes:
-            # get property name and object
-            for k, v in cls.__dict__.iteritems():
-                if isinstance(v, property):
-                    # skip properties in xml parsing
-                    if k in ['icon', 'type', 'parent', 'row', 'childCount']:
-                        break
-                    kv[k] = getattr(self, k)
+        for column, getter in zip(self.COLUMNS, self._getters):
+            # the type is already the element name
+            if column.attr != 'type':
+                kv[column.attr] = getter(self)
         return kv
 
-    def asXml(self):
+    def asXml(self, indent=4):
         """
         Return the xml formatting of the node hierarchy and all of its
-        attribute/property names and values, used on root node
+        attribute/property names and values, used on root node, see
+        writeXml()
 
+        :param indent: int. number of spaces per level, 0 writes the whole
+        document on one line, which is much faster for very deep hierarchies
         :return: str. output string formatted as xml
         """
-        doc = QtXml.QDomDocument()
-        node = doc.createElement(self.type)
-        doc.appendChild(node)
-        for child in self._children:
-            child._recurseXml(doc, node)
+        output = QtCore.QByteArray()
+        writer = QtCore.QXmlStreamWriter(output)
+        writer.setAutoFormatting(indent > 0)
+        writer.setAutoFormattingIndent(indent)
 
-        return doc.toString(indent=4)
+        for count in self.writeXml(writer):
+            pass
 
-    def _recurseXml(self, doc, parent):
-        """
-        Recursively generate xml elements
+        return xmlText(output)
 
-        :param doc: QDomDocument. xml root
-        :param parent: QDomElement. xml parent element
+    def writeXml(self, writer):
         """
-        node = doc.createElement(self.type)
-        parent.appendChild(node)
-        attrs = self.attrs().iteritems()
-        for k, v in attrs:
-            node.setAttribute(k, v)
+        Write the xml of the hierarchy one element at a time, see writeXml()
 
-        for child in self._children:
-            child._recurseXml(doc, node)
+        :param writer: QXmlStreamWriter. writer to write the elements with
+        :return: generator. number of nodes written so far, after each node
+        """
+        return writeXml(self, writer)
 
     # -------------- Child insert/remove -------------- #
 
@@ -158,6 +441,38 @@ class Node(object):
 
     # ---------------- Data <-> Model handling ------------------- #
 
+    @classmethod
+    def columnCount(cls):
+        """
+        :return: int. number of columns declared by the node class
+        """
+        return len(cls.COLUMNS)
+
+    @classmethod
+    def columnIndex(cls, attr):
+        """
+        :param attr: str. property name
+        :return: int. column of the property, -1 if not declared
+        """
+        return cls._columnIndex.get(attr, -1)
+
+    @classmethod
+    def columnHeader(cls, column):
+        """
+        :param column: int. column index
+        :return: str. header of the column, None if not declared
+        """
+        if 0 <= column < len(cls.COLUMNS):
+            return cls.COLUMNS[column].header
+        return None
+
+    def isEditable(self, column):
+        """
+        :param column: int. column index of the model
+        :return: bool. whether the column can be edited on this node
+        """
+        return 0 <= column < len(self._editable) and self._editable[column]
+
     def data(self, column):
         """
         Custom: return underlying value of the current Node based on column,
@@ -166,10 +481,9 @@ class Node(object):
         :param column: int. column index of the model
         :return:
         """
-        if column == 0:
-            return self.name
-        elif column == 1:
-            return self.type
+        if 0 <= column < len(self._getters):
+            return self._getters[column](self)
+        return None
     
     def setData(self, column, value):
         """
@@ -179,20 +493,27 @@ class Node(object):
         :param column: int. column index of the model
         :param value: QVariant. value for a certain property of the item
         """
-        if column == 0:
-            self.name = value
+        if 0 <= column < len(self._setters):
+            setter = self._setters[column]
+            if setter is not None:
+                setter(self, value)
 
 
+@compileColumns
 class TransformNode(Node):
-    def __init__(self, name, parent=None):
-        super(TransformNode, self).__init__(name, parent)
-        self._icon = QtGui.QIcon(QtGui.QPixmap(
-            os.path.join(ICON_PATH, 'transform.png')
-        ))
-        self._type = 'transform'
-        self._x = 0
-        self._y = 0
-        self._z = 0
+    _type = 'transform'
+    _iconFile = 'transform.png'
+
+    COLUMNS = Node.COLUMNS + (
+        Column('x', 'X', float),
+        Column('y', 'Y', float),
+        Column('z', 'Z', float),
+    )
+
+    # default values, shared until set on the instance
+    _x = 0
+    _y = 0
+    _z = 0
 
     @property
     def x(self):
@@ -208,7 +529,7 @@ class TransformNode(Node):
 
     @y.setter
     def y(self, value):
-        self.y = value
+        self._y = value
 
     @property
     def z(self):
@@ -216,37 +537,22 @@ class TransformNode(Node):
 
     @z.setter
     def z(self, value):
-        self.z = value
-
-    def data(self, column):
-        r = super(TransformNode, self).data(column)
-        if column == 2:
-            r = self.x
-        elif column == 3:
-            r = self.y
-        elif column == 4:
-            r = self.z
-        return r
-    
-    def setData(self, column, value):
-        super(TransformNode, self).setData(column, value)
-        if column == 2:
-            self.x = value
-        elif column == 3:
-            self.y = value
-        elif column == 4:
-            self.z = value
+        self._z = value
 
 
+@compileColumns
 class CameraNode(Node):
-    def __init__(self, name, parent=None):
-        super(CameraNode, self).__init__(name, parent)
-        self._icon = QtGui.QIcon(QtGui.QPixmap(
-            os.path.join(ICON_PATH, 'camera.png')
-        ))
-        self._type = 'camera'
-        self._motionBlur = True
-        self._shakeIntensity = 50.0
+    _type = 'camera'
+    _iconFile = 'camera.png'
+
+    COLUMNS = Node.COLUMNS + (
+        Column('motionBlur', 'Motion Blur', bool),
+        Column('shakeIntensity', 'Shake Intensity', float),
+    )
+
+    # default values, shared until set on the instance
+    _motionBlur = True
+    _shakeIntensity = 50.0
 
     @property
     def motionBlur(self):
@@ -264,35 +570,27 @@ class CameraNode(Node):
     def shakeIntensity(self, value):
         self._shakeIntensity = value
         
-    def data(self, column):
-        r = super(CameraNode, self).data(column)
-        if column == 2:
-            r = self.motionBlur
-        elif column == 3:
-            r = self.shakeIntensity
-        
-        return r
-    
-    def setData(self, column, value):
-        super(CameraNode, self).setData(column, value)
-        if column == 2:
-            self.motionBlur = value
-        elif column == 3:
-            self.shakeIntensity = value
-
 
+@compileColumns
 class LightNode(Node):
-    def __init__(self, name, parent=None):
-        super(LightNode, self).__init__(name, parent)
-        self._icon = QtGui.QIcon(QtGui.QPixmap(
-            os.path.join(ICON_PATH, 'light.png')
-        ))
-        self._type = 'light'
-        self._intensity = 1.0
-        self._nearRange = 40.0
-        self._farRange = 80.0
-        self._castShadows = True
-        self._shape = LightShapes(0)
+    _type = 'light'
+    _iconFile = 'light.png'
+
+    COLUMNS = Node.COLUMNS + (
+        Column('intensity', 'Intensity', float),
+        Column('nearRange', 'Near Range', float),
+        Column('farRange', 'Far Range', float),
+        Column('castShadows', 'Cast Shadows', bool),
+        Column('shape', 'Shape', str, convert=toLightShape,
+               mapperProperty=b'currentIndex'),
+    )
+
+    # default values, shared until set on the instance
+    _intensity = 1.0
+    _nearRange = 40.0
+    _farRange = 80.0
+    _castShadows = True
+    _shape = LightShapes.POINT
 
     @property
     def intensity(self):
@@ -334,31 +632,23 @@ class LightNode(Node):
     def shape(self, value):
         self._shape = value
 
-    def data(self, column):
-        r = super(LightNode, self).data(column)
-        if column == 2:
-            r = self.intensity
-        elif column == 3:
-            r = self.nearRange
-        elif column == 4:
-            r = self.farRange
-        elif column == 5:
-            r = self.castShadows
-        elif column == 6:
-            r = self.shape
-        
-        return r
-    
-    def setData(self, column, value):
-        super(LightNode, self).setData(column, value)
-        
-        if column == 2:
-            self.intensity = value
-        elif column == 3:
-            self.nearRange = value
-        elif column == 4:
-            self.farRange = value
-        elif column == 5:
-            self.castShadows = value
-        elif column == 6:
-            self.shape = LightShapes(value)
+
+NODE_CLASSES = (Node, TransformNode, CameraNode, LightNode)
+
+
+def sceneColumns(classes=NODE_CLASSES):
+    """
+    Merge the column declarations of the node classes, in order and without
+    duplicated properties, into the column layout of a whole scene
+
+    :param classes: tuple. node classes present in the scene
+    :return: tuple. Column declarations
+    """
+    columns = list()
+    attrs = set()
+    for cls in classes:
+        for column in cls.COLUMNS:
+            if column.attr not in attrs:
+                attrs.add(column.attr)
+                columns.append(column)
+    return tuple(columns)
@@ -0,0 +1,242 @@
+"""
+Opt-in profiling of the model/view hot paths
+
+Profiler.instrument() replaces the given methods of a class (e.g. data,
+index, parent, rowCount, setData and flags of a model) with wrappers
+counting the calls per role and column and recording their latency in a
+log2 histogram of microseconds. Nothing is wrapped unless instrument() is
+called, so the models run untouched when profiling is off
+
+example:
+    profile = Profiler()
+    profile.instrument(model.SceneGraphModel, MODEL_METHODS)
+    profile.instrument(PaletteListModel, MODEL_METHODS)
+    ...
+    print(profile.report())
+    profile.dump('stats.json')
+    profile.uninstrument()
+
+running view.py with the MODEL_PROFILE environment variable set to a file
+path profiles the window and writes the stats there on exit
+"""
+
+import functools
+import json
+import timeit
+
+from Qt import QtCore
+
+
+MODEL_METHODS = ('data', 'index', 'parent', 'rowCount', 'setData', 'flags')
+
+
+def _roleColumn(roleArg, default=None):
+    """
+    Build the key function of a method taking an index first and the role at
+    the given argument position
+    """
+    def key(args, kwargs):
+        index = args[0] if args else kwargs.get('index')
+        column = index.column() if index is not None else None
+        if roleArg is None:
+            return None, column
+        if len(args) > roleArg:
+            return int(args[roleArg]), column
+        return kwargs.get('role', default), column
+    return key
+
+
+# method name -> function returning the (role, column) of a call
+KEY_FUNCTIONS = {
+    'data': _roleColumn(1, int(QtCore.Qt.DisplayRole)),
+    'setData': _roleColumn(2, int(QtCore.Qt.EditRole)),
+    'flags': _roleColumn(None),
+    'parent': _roleColumn(None),
+    'index': lambda args, kwargs: (None, args[1] if len(args) > 1 else None),
+}
+
+
+def _noKey(args, kwargs):
+    return None, None
+
+
+class Stat(object):
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        # bucket n counts the calls taking less than 2**n microseconds
+        self.histogram = dict()
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        bucket = int(seconds * 1000000).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def percentile(self, ratio):
+        """
+        :param ratio: float. e.g. 0.99
+        :return: float. upper bound in microseconds of the bucket holding
+        the percentile
+        """
+        target = self.count * ratio
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= target:
+                return float(2 ** bucket)
+        return 0.0
+
+    def asDict(self):
+        return {
+            'count': self.count,
+            'totalSeconds': self.total,
+            'maxSeconds': self.maximum,
+            'histogramMicroseconds': dict(
+                ('<{}'.format(2 ** bucket), count)
+                for bucket, count in sorted(self.histogram.items())),
+        }
+
+
+class Profiler(object):
+    def __init__(self):
+        # (method label, role, column) -> Stat
+        self._stats = dict()
+        # (class, method name) -> original function
+        self._originals = dict()
+
+    def instrument(self, cls, methodNames):
+        """
+        Wrap the methods of the class, the methods are restored by
+        uninstrument()
+
+        :param cls: type. class to instrument, e.g. SceneGraphModel
+        :param methodNames: iterable. names of the methods to wrap
+        """
+        for name in methodNames:
+            if (cls, name) in self._originals:
+                continue
+            original = cls.__dict__.get(name)
+            if original is None:
+                # inherited from the Qt base class, nothing to time
+                continue
+            self._originals[(cls, name)] = original
+            setattr(cls, name, self._wrap(cls, name, original))
+
+    def uninstrument(self):
+        """
+        Restore all the wrapped methods
+        """
+        for (cls, name), original in self._originals.items():
+            setattr(cls, name, original)
+        self._originals = dict()
+
+    def _wrap(self, cls, name, original):
+        label = '{}.{}'.format(cls.__name__, name)
+        keyFunction = KEY_FUNCTIONS.get(name, _noKey)
+        stats = self._stats
+        timer = timeit.default_timer
+
+        @functools.wraps(original)
+        def wrapper(obj, *args, **kwargs):
+            start = timer()
+            try:
+                return original(obj, *args, **kwargs)
+            finally:
+                elapsed = timer() - start
+                role, column = keyFunction(args, kwargs)
+                key = (label, role, column)
+                stat = stats.get(key)
+                if stat is None:
+                    stat = stats[key] = Stat()
+                stat.add(elapsed)
+
+        return wrapper
+
+    def reset(self):
+        self._stats.clear()
+
+    def stats(self):
+        """
+        :return: dict. (method label, role, column) -> Stat
+        """
+        return dict(self._stats)
+
+    def methodStats(self):
+        """
+        Merge the stats of all the roles and columns per method
+
+        :return: dict. method label -> Stat
+        """
+        merged = dict()
+        for (label, role, column), stat in self._stats.items():
+            total = merged.setdefault(label, Stat())
+            total.count += stat.count
+            total.total += stat.total
+            total.maximum = max(total.maximum, stat.maximum)
+            for bucket, count in stat.histogram.items():
+                total.histogram[bucket] = (
+                    total.histogram.get(bucket, 0) + count)
+        return merged
+
+    def report(self):
+        """
+        :return: str. table of the calls per method, then per role/column
+        """
+        lines = ['{:<40} {:>10} {:>12} {:>10} {:>10}'.format(
+            'method', 'calls', 'total ms', 'p50 us', 'p99 us')]
+        methods = self.methodStats()
+        for label in sorted(methods, key=lambda k: -methods[k].total):
+            stat = methods[label]
+            lines.append('{:<40} {:>10} {:>12.2f} {:>10.0f} {:>10.0f}'.format(
+                label, stat.count, stat.total * 1000,
+                stat.percentile(0.5), stat.percentile(0.99)))
+
+        lines.append('')
+        lines.append('{:<40} {:>6} {:>6} {:>10}'.format(
+            'method', 'role', 'column', 'calls'))
+        for (label, role, column), stat in sorted(
+                self._stats.items(), key=lambda item: -item[1].count):
+            lines.append('{:<40} {:>6} {:>6} {:>10}'.format(
+                label, '-' if role is None else role,
+                '-' if column is None else column, stat.count))
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """
+        Export the stats as json
+
+        :param path: str. output file path
+        """
+        data = list()
+        for (label, role, column), stat in sorted(
+                self._stats.items(), key=lambda item: item[0][0]):
+            entry = stat.asDict()
+            entry.update({'method': label, 'role': role, 'column': column})
+            data.append(entry)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+
+def instrumentScene(profile, windowClass=None):
+    """
+    Instrument the hot paths of the data widget mapper example: the scene
+    graph model callbacks, the xml painting and the xml refresh
+
+    :param profile: Profiler. profiler recording the calls
+    :param windowClass: type. main window class to instrument, view.py run
+    as a script has to pass its own MainWindow since the class of the
+    __main__ module isn't view.MainWindow
+    """
+    import model
+    import xmlViewer
+
+    if windowClass is None:
+        import view
+        windowClass = view.MainWindow
+
+    profile.instrument(model.SceneGraphModel, MODEL_METHODS)
+    profile.instrument(xmlViewer.XmlViewer, ('paintEvent',))
+    profile.instrument(windowClass, ('updateXml',))
@@ -0,0 +1,304 @@
+"""
+The query module answers attribute questions over the scene graph, e.g.
+"all lights with intensity > 2 and castShadows" or "cameras with
+shakeIntensity between 10 and 30", and returns the result as model indexes
+
+example:
+    engine = SceneQueryEngine(sceneGraphModel)
+    query = Query('light').where('intensity', '>', 2).where(
+        'castShadows', '==', True)
+    indexes = engine.run(query)
+
+Each (type, attribute) pair used in a query gets a sorted index built on
+first use, range conditions are then resolved with a binary search instead
+of calling Node.data() on every node. An edit only drops the indexes of
+the edited attributes, inserted/removed rows or a reset drop everything;
+the indexes are rebuilt lazily on the next query
+
+QueryFilterProxyModel uses a query as the filter predicate of a
+QSortFilterProxyModel instead of a regular expression on filterRole
+"""
+
+import bisect
+import operator
+
+from Qt import QtCore
+
+import node
+
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+class Query(object):
+    def __init__(self, nodeType=None):
+        """
+        Initialization
+
+        :param nodeType: str. only match nodes of this type, e.g. 'light',
+        None to match every type
+        """
+        self._nodeType = nodeType
+        self._conditions = list()
+
+    @property
+    def nodeType(self):
+        return self._nodeType
+
+    @property
+    def conditions(self):
+        """
+        :return: list. (attribute, operator, value) tuples
+        """
+        return list(self._conditions)
+
+    def where(self, attr, op, value):
+        """
+        Add a condition, all conditions have to be met
+
+        :param attr: str. node property name, e.g. 'intensity'
+        :param op: str. one of the OPERATORS keys
+        :param value: value to compare the property with
+        :return: Query. the query itself for chaining
+        """
+        if op not in OPERATORS:
+            raise ValueError('unsupported operator: {}'.format(op))
+        self._conditions.append((attr, op, value))
+        return self
+
+    def between(self, attr, low, high):
+        """
+        Add an inclusive range condition
+
+        :param attr: str. node property name
+        :param low: lower bound
+        :param high: upper bound
+        :return: Query. the query itself for chaining
+        """
+        return self.where(attr, '>=', low).where(attr, '<=', high)
+
+    def matches(self, currentNode):
+        """
+        Evaluate the query on a single node
+
+        :param currentNode: Node. node to test
+        :return: bool. whether the node meets all the conditions
+        """
+        if self._nodeType is not None and currentNode.type != self._nodeType:
+            return False
+
+        for attr, op, value in self._conditions:
+            if not hasattr(currentNode, attr):
+                return False
+            if not OPERATORS[op](getattr(currentNode, attr), value):
+                return False
+        return True
+
+
+class SceneQueryEngine(QtCore.QObject):
+    def __init__(self, model, parent=None):
+        """
+        Initialization, the engine listens to the model signals to know when
+        its indexes become stale
+
+        :param model: SceneGraphModel. model to query
+        :param parent: QObject. parent object
+        """
+        super(SceneQueryEngine, self).__init__(parent)
+        self._model = model
+        self._revision = 0
+        self._nodesByType = None
+        self._indexes = dict()
+        # model column -> property name, see SceneGraphModel
+        self._columnAttrs = [column.attr for column in node.sceneColumns()]
+
+        model.dataChanged.connect(self._onDataChanged)
+        model.rowsInserted.connect(self.invalidate)
+        model.rowsRemoved.connect(self.invalidate)
+        model.modelReset.connect(self.invalidate)
+
+    @property
+    def revision(self):
+        """
+        :return: int. counter increased on every change of the results
+        """
+        return self._revision
+
+    def invalidate(self, *args):
+        """
+        Drop the cached node lists and attribute indexes
+        """
+        self._revision += 1
+        self._nodesByType = None
+        self._indexes = dict()
+
+    def _onDataChanged(self, topLeft, bottomRight, roles=()):
+        """
+        Drop the indexes of the edited attributes only, the nodes are the
+        same and the indexes of the other attributes still hold
+        """
+        self._revision += 1
+        attrs = set(self._columnAttrs[topLeft.column():
+                                      bottomRight.column() + 1])
+        for key in list(self._indexes):
+            if key[1] in attrs:
+                del self._indexes[key]
+
+    def _nodes(self, nodeType):
+        if self._nodesByType is None:
+            self._nodesByType = dict()
+            root = self._model.getNode(QtCore.QModelIndex())
+            for current, depth in root.walk():
+                if current is not root:
+                    self._nodesByType.setdefault(
+                        current.type, list()).append(current)
+
+        if nodeType is None:
+            nodes = list()
+            for typeNodes in self._nodesByType.values():
+                nodes.extend(typeNodes)
+            return nodes
+        return self._nodesByType.get(nodeType, list())
+
+    def _attributeIndex(self, nodeType, attr):
+        """
+        Sorted (values, nodes) lists of an attribute for the nodes of a type
+        """
+        key = (nodeType, attr)
+        index = self._indexes.get(key)
+        if index is None:
+            pairs = [
+                (getattr(current, attr), i, current)
+                for i, current in enumerate(self._nodes(nodeType))
+                if hasattr(current, attr)
+            ]
+            pairs.sort(key=operator.itemgetter(0, 1))
+            index = (
+                [pair[0] for pair in pairs],
+                [pair[2] for pair in pairs],
+            )
+            self._indexes[key] = index
+        return index
+
+    def _lookup(self, nodeType, attr, op, value):
+        values, nodes = self._attributeIndex(nodeType, attr)
+        if op == '==':
+            start = bisect.bisect_left(values, value)
+            end = bisect.bisect_right(values, value)
+        elif op == '>':
+            start, end = bisect.bisect_right(values, value), len(values)
+        elif op == '>=':
+            start, end = bisect.bisect_left(values, value), len(values)
+        elif op == '<':
+            start, end = 0, bisect.bisect_left(values, value)
+        elif op == '<=':
+            start, end = 0, bisect.bisect_right(values, value)
+        else:
+            return [current for current in nodes
+                    if OPERATORS[op](getattr(current, attr), value)]
+        return nodes[start:end]
+
+    def select(self, query):
+        """
+        Resolve the query into nodes, the first condition goes through the
+        attribute index and the rest only test the remaining candidates
+
+        :param query: Query. query to run
+        :return: list. matching nodes
+        """
+        conditions = query.conditions
+        if not conditions:
+            return list(self._nodes(query.nodeType))
+
+        attr, op, value = conditions[0]
+        candidates = self._lookup(query.nodeType, attr, op, value)
+        for attr, op, value in conditions[1:]:
+            compare = OPERATORS[op]
+            candidates = [
+                current for current in candidates
+                if hasattr(current, attr)
+                and compare(getattr(current, attr), value)
+            ]
+        return candidates
+
+    def run(self, query):
+        """
+        Resolve the query into model indexes
+
+        :param query: Query. query to run
+        :return: list. QModelIndex of the matching nodes
+        """
+        return [self._model.indexForNode(current)
+                for current in self.select(query)]
+
+
+class QueryFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """
+    Sort filter proxy model accepting the rows matched by a query, along with
+    their ancestors so the matches stay reachable in a tree view; without a
+    query it falls back to the regular expression filtering
+    """
+    def __init__(self, parent=None):
+        super(QueryFilterProxyModel, self).__init__(parent)
+        self._engine = None
+        self._query = None
+        self._accepted = set()
+        self._acceptedRevision = None
+
+    def setSourceModel(self, model):
+        """
+        Override: the engine connects to the source model before the proxy
+        so that it is invalidated before the proxy refilters
+        """
+        self._engine = SceneQueryEngine(model, self)
+        super(QueryFilterProxyModel, self).setSourceModel(model)
+
+    def engine(self):
+        """
+        :return: SceneQueryEngine. query engine over the source model
+        """
+        return self._engine
+
+    def setQuery(self, query):
+        """
+        Custom: filter the rows with the given query
+
+        :param query: Query. query to filter with, None to clear
+        """
+        self._query = query
+        self._acceptedRevision = None
+        self.invalidateFilter()
+
+    def _acceptedNodes(self):
+        if self._acceptedRevision != self._engine.revision:
+            root = self.sourceModel().getNode(QtCore.QModelIndex())
+            accepted = set()
+            for current in self._engine.select(self._query):
+                while current is not None and current is not root:
+                    if current in accepted:
+                        break
+                    accepted.add(current)
+                    current = current.parent
+            self._accepted = accepted
+            self._acceptedRevision = self._engine.revision
+        return self._accepted
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        """
+        Override: accept the row when its node is matched by the query or is
+        an ancestor of a match
+        """
+        if self._query is None:
+            return super(QueryFilterProxyModel, self).filterAcceptsRow(
+                sourceRow, sourceParent)
+
+        parentNode = self.sourceModel().getNode(sourceParent)
+        currentNode = parentNode.child(sourceRow)
+        return currentNode in self._acceptedNodes()
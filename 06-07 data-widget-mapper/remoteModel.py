@@ -0,0 +1,338 @@
+"""
+The remote model mirrors the SceneGraphModel published by a
+SceneModelServer (see modelServer module) in another process
+
+only the rows fetched by the views are kept: a row knows how many children
+it has, but its children are only requested from the server when a view
+expands it (canFetchMore/fetchMore); the server then only sends the changes
+of the displayed rows
+
+edits are sent to the server and go through its undo stack, the mirror is
+updated when the server publishes the change back, so every process
+displays the same state
+
+the requests carry the revision of the mirrored rows; the server rejects
+the ones made on rows it has moved since, a rejected fetch is sent again
+with the current rows of its node, a rejected edit is dropped
+
+example:
+    remote = RemoteSceneModel()
+    remote.connectToServer('sceneGraphModel')
+    treeView.setModel(remote)
+"""
+
+import sys
+
+from Qt import QtCore, QtNetwork, QtWidgets
+
+import modelServer
+import node
+
+
+class RemoteNode(object):
+    __slots__ = ('type', 'values', 'childCount', 'children', 'parent',
+                 'requested')
+
+    def __init__(self, nodeType, childCount, values, parent=None):
+        self.type = nodeType
+        self.values = values
+        self.childCount = childCount
+        # None until fetched from the server
+        self.children = None
+        self.parent = parent
+        self.requested = False
+
+    @property
+    def row(self):
+        if self.parent is not None:
+            return self.parent.children.index(self)
+        return 0
+
+
+class RemoteSceneModel(QtCore.QAbstractItemModel):
+    sortRole = QtCore.Qt.UserRole
+    filterRole = QtCore.Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super(RemoteSceneModel, self).__init__(parent)
+        self._columns = node.sceneColumns()
+        self._icons = dict(
+            (cls._type, cls._iconFile) for cls in node.NODE_CLASSES)
+        self._multiColumn = False
+
+        self._rootNode = RemoteNode('node', 0, list())
+        # structure operations applied, see modelServer
+        self._revision = 0
+        # node -> revision of its pending fetch request
+        self._fetching = dict()
+        self._reader = modelServer.FrameReader()
+        self._socket = QtNetwork.QLocalSocket(self)
+        self._socket.readyRead.connect(self._onReadyRead)
+
+        self._handlers = {
+            'reset': self._applyReset,
+            'set': self._applySet,
+            'insert': self._applyInsert,
+            'remove': self._applyRemove,
+            'children': self._applyChildren,
+            'stale': self._applyStale,
+        }
+
+    def connectToServer(self, name=modelServer.SERVER_NAME):
+        """
+        Custom: connect to a running SceneModelServer, the model is reset
+        with the top level rows once connected
+
+        :param name: str. name of the local socket
+        """
+        self._socket.connectToServer(name)
+
+    def _send(self, operation):
+        self._socket.write(modelServer.encodeFrame([operation]))
+
+    # ------------ Mirror ---------------#
+
+    def _findNode(self, rows):
+        """
+        :return: RemoteNode. mirrored node of the rows, None if it hasn't
+        been fetched
+        """
+        currentNode = self._rootNode
+        for row in rows:
+            if currentNode.children is None:
+                return None
+            if not 0 <= row < len(currentNode.children):
+                return None
+            currentNode = currentNode.children[row]
+        return currentNode
+
+    def _indexForNode(self, currentNode, column=0):
+        if currentNode is self._rootNode:
+            return QtCore.QModelIndex()
+        return self.createIndex(currentNode.row, column, currentNode)
+
+    def _onReadyRead(self):
+        for operations in self._reader.feed(bytes(self._socket.readAll())):
+            for operation in operations:
+                self._handlers[operation[0]](*operation[1:])
+
+    def _fetch(self, currentNode):
+        currentNode.requested = True
+        self._fetching[currentNode] = self._revision
+        self._send(['fetch', self._revision, node.rowPath(currentNode)])
+
+    def _applyReset(self, revision, childCount):
+        self._revision = revision
+        self.beginResetModel()
+        self._rootNode = RemoteNode('node', childCount, list())
+        self._fetching = dict()
+        self.endResetModel()
+
+    def _applySet(self, rows, column, value):
+        currentNode = self._findNode(rows)
+        if currentNode is None:
+            return
+        currentNode.values[column] = value
+        index = self._indexForNode(currentNode, column)
+        self.dataChanged.emit(index, index)
+
+    def _applyInsert(self, revision, rows, first, summaries):
+        self._revision = revision
+        parentNode = self._findNode(rows)
+        if parentNode is None:
+            return
+        if parentNode.children is None:
+            # not fetched yet, only the expandability changes
+            parentNode.childCount += len(summaries)
+            index = self._indexForNode(parentNode)
+            self.dataChanged.emit(index, index)
+            return
+
+        parent = self._indexForNode(parentNode)
+        self.beginInsertRows(parent, first, first + len(summaries) - 1)
+        parentNode.children[first:first] = [
+            RemoteNode(nodeType, childCount, values, parentNode)
+            for nodeType, childCount, values in summaries]
+        parentNode.childCount = len(parentNode.children)
+        self.endInsertRows()
+
+    def _applyRemove(self, revision, rows, first, last):
+        self._revision = revision
+        parentNode = self._findNode(rows)
+        if parentNode is None:
+            return
+        if parentNode.children is None:
+            parentNode.childCount -= last - first + 1
+            index = self._indexForNode(parentNode)
+            self.dataChanged.emit(index, index)
+            return
+
+        # the pending fetches of the removed rows won't be answered
+        removed = set(parentNode.children[first:last + 1])
+        for currentNode in list(self._fetching):
+            ancestor = currentNode
+            while ancestor is not None and ancestor not in removed:
+                ancestor = ancestor.parent
+            if ancestor is not None:
+                del self._fetching[currentNode]
+
+        parent = self._indexForNode(parentNode)
+        self.beginRemoveRows(parent, first, last)
+        del parentNode.children[first:last + 1]
+        parentNode.childCount = len(parentNode.children)
+        self.endRemoveRows()
+
+    def _applyChildren(self, rows, summaries):
+        parentNode = self._findNode(rows)
+        if parentNode is None or parentNode.children is not None:
+            return
+        self._fetching.pop(parentNode, None)
+
+        parent = self._indexForNode(parentNode)
+        parentNode.childCount = len(summaries)
+        if not summaries:
+            parentNode.children = list()
+            return
+        self.beginInsertRows(parent, 0, len(summaries) - 1)
+        parentNode.children = [
+            RemoteNode(nodeType, childCount, values, parentNode)
+            for nodeType, childCount, values in summaries]
+        self.endInsertRows()
+
+    def _applyStale(self, name, revision, rows):
+        """
+        A request was made on rows moved since, the fetches made before the
+        current revision are sent again
+        """
+        if name != 'fetch':
+            return
+        for currentNode, requested in list(self._fetching.items()):
+            if requested != self._revision:
+                self._fetch(currentNode)
+
+    # ------------ Model ---------------#
+
+    def getNode(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self._rootNode
+
+    def rowCount(self, parent):
+        parentNode = self.getNode(parent)
+        if parentNode.children is None:
+            return 0
+        return len(parentNode.children)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        return self.getNode(parent).childCount > 0
+
+    def canFetchMore(self, parent):
+        parentNode = self.getNode(parent)
+        return (parentNode.children is None and parentNode.childCount > 0
+                and not parentNode.requested)
+
+    def fetchMore(self, parent):
+        """
+        Override: request the children from the server, they are inserted
+        when the answer comes back
+        """
+        self._fetch(self.getNode(parent))
+
+    def columnCount(self, parent):
+        if self._multiColumn:
+            return len(self._columns)
+        return 1
+
+    def setMultiColumn(self, enabled):
+        """
+        Custom: see SceneGraphModel.setMultiColumn()
+        """
+        if enabled == self._multiColumn:
+            return
+        self.beginResetModel()
+        self._multiColumn = enabled
+        self.endResetModel()
+
+    def columnForAttr(self, attr):
+        for column, declaration in enumerate(self._columns):
+            if declaration.attr == attr:
+                return column
+        return -1
+
+    def data(self, index, role):
+        if not index.isValid():
+            return None
+
+        currentNode = index.internalPointer()
+        column = index.column()
+        if column >= len(currentNode.values):
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return currentNode.values[column]
+        if role == QtCore.Qt.DecorationRole and column == 0:
+            iconFile = self._icons.get(currentNode.type)
+            if iconFile:
+                return node.loadIcon(iconFile)
+        if role == RemoteSceneModel.sortRole:
+            return self._columns[column].sortKey(currentNode.values[column])
+        if role == RemoteSceneModel.filterRole:
+            return currentNode.type
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        """
+        Override: the edit is sent to the server, the value is displayed
+        once the server publishes it back
+        """
+        if index.isValid() and role == QtCore.Qt.EditRole:
+            rows = node.rowPath(index.internalPointer())
+            self._send(
+                ['setData', self._revision, rows, index.column(), value])
+            return True
+        return False
+
+    def headerData(self, section, orientation, role):
+        if role == QtCore.Qt.DisplayRole:
+            if 0 <= section < len(self._columns):
+                return self._columns[section].header
+
+    def flags(self, index):
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.isValid():
+            currentNode = index.internalPointer()
+            column = index.column()
+            if (self._columns[column].editable
+                    and currentNode.values[column] is not None):
+                flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def parent(self, index):
+        currentNode = self.getNode(index)
+        parentNode = currentNode.parent
+        if parentNode is None or parentNode is self._rootNode:
+            return QtCore.QModelIndex()
+        return self.createIndex(parentNode.row, 0, parentNode)
+
+    def index(self, row, column, parent):
+        parentNode = self.getNode(parent)
+        if parentNode.children is None:
+            return QtCore.QModelIndex()
+        if not 0 <= row < len(parentNode.children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, parentNode.children[row])
+
+
+if __name__ == '__main__':
+    app = QtWidgets.QApplication(sys.argv)
+
+    remote = RemoteSceneModel()
+    remote.setMultiColumn(True)
+    remote.connectToServer(
+        sys.argv[1] if len(sys.argv) > 1 else modelServer.SERVER_NAME)
+
+    treeView = QtWidgets.QTreeView()
+    treeView.setUniformRowHeights(True)
+    treeView.setModel(remote)
+    treeView.show()
+
+    sys.exit(app.exec_())
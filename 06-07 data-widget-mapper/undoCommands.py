@@ -0,0 +1,170 @@
+"""
+The undoCommands module wraps every edit made to the SceneGraphModel into a
+QUndoCommand so that it can be pushed onto the model's QUndoStack and be
+undone/redone later.
+
+Continuous edits (like dragging a spinbox) on the same node and column are
+merged into one command, and the structural commands only keep the parent,
+the row position and the detached child nodes rather than copies of the
+whole subtree, so the memory used by the history stays flat.
+
+qt docs: https://doc.qt.io/qt-5/qundostack.html
+merging: https://doc.qt.io/qt-5/qundocommand.html#mergeWith
+"""
+
+from Qt import QtWidgets
+
+
+SET_DATA_ID = 1000
+SET_VALUES_ID = 1001
+
+
+class SetDataCommand(QtWidgets.QUndoCommand):
+    def __init__(self, model, node, column, value, parent=None):
+        """
+        Initialization
+
+        :param model: SceneGraphModel. model that owns the node
+        :param node: Node. node being edited
+        :param column: int. column of the property being edited
+        :param value: QVariant. new value of the property
+        :param parent: QUndoCommand. parent command
+        """
+        super(SetDataCommand, self).__init__(parent)
+        self._model = model
+        self._node = node
+        self._column = column
+        self._old = model.nodeData(node, column)
+        self._new = value
+
+        self.setText('Edit {} [{}]'.format(node.name, column))
+
+    def id(self):
+        """
+        Override: commands of the same id are candidates for mergeWith()
+        """
+        return SET_DATA_ID
+
+    def mergeWith(self, other):
+        """
+        Override: merge consecutive edits of the same node and column,
+        keeping the oldest value for undo and the newest value for redo
+
+        :param other: QUndoCommand. the command just pushed onto the stack
+        :return: bool. whether the other command is merged into this one
+        """
+        if other.id() != self.id():
+            return False
+        if other._node is not self._node or other._column != self._column:
+            return False
+
+        self._new = other._new
+        return True
+
+    def redo(self):
+        self._model.applyData(self._node, self._column, self._new)
+
+    def undo(self):
+        self._model.applyData(self._node, self._column, self._old)
+
+
+class SetValuesCommand(QtWidgets.QUndoCommand):
+    def __init__(self, model, nodes, column, values, parent=None):
+        """
+        Initialization, one command for the same property of many nodes
+
+        :param model: SceneGraphModel. model that owns the nodes
+        :param nodes: list. nodes being edited
+        :param column: int. column of the property being edited
+        :param values: list. new value of each node
+        :param parent: QUndoCommand. parent command
+        """
+        super(SetValuesCommand, self).__init__(parent)
+        self._model = model
+        self._nodes = list(nodes)
+        self._column = column
+        self._old = [model.nodeData(n, column) for n in self._nodes]
+        self._new = list(values)
+
+        self.setText('Edit {} nodes [{}]'.format(len(self._nodes), column))
+
+    def id(self):
+        return SET_VALUES_ID
+
+    def mergeWith(self, other):
+        """
+        Override: merge consecutive edits of the same nodes and column, see
+        SetDataCommand.mergeWith()
+        """
+        if other.id() != self.id() or other._column != self._column:
+            return False
+        if len(other._nodes) != len(self._nodes):
+            return False
+        if any(a is not b for a, b in zip(other._nodes, self._nodes)):
+            return False
+
+        self._new = other._new
+        return True
+
+    def redo(self):
+        self._model.applyValues(self._nodes, self._column, self._new)
+
+    def undo(self):
+        self._model.applyValues(self._nodes, self._column, self._old)
+
+
+class InsertNodesCommand(QtWidgets.QUndoCommand):
+    def __init__(self, model, parentNode, position, nodes, parent=None):
+        """
+        Initialization
+
+        :param model: SceneGraphModel. model that owns the parent node
+        :param parentNode: Node. node to insert the children under
+        :param position: int. row position to insert
+        :param nodes: list. nodes to be inserted
+        :param parent: QUndoCommand. parent command
+        """
+        super(InsertNodesCommand, self).__init__(parent)
+        self._model = model
+        self._parentNode = parentNode
+        self._position = position
+        self._nodes = list(nodes)
+
+        self.setText('Insert {} node(s)'.format(len(self._nodes)))
+
+    def redo(self):
+        self._model.insertNodes(self._parentNode, self._position, self._nodes)
+
+    def undo(self):
+        self._model.takeNodes(
+            self._parentNode, self._position, len(self._nodes))
+
+
+class RemoveNodesCommand(QtWidgets.QUndoCommand):
+    def __init__(self, model, parentNode, position, count, parent=None):
+        """
+        Initialization, the removed nodes are only collected on redo(), the
+        detached subtrees are kept as they are instead of being copied
+
+        :param model: SceneGraphModel. model that owns the parent node
+        :param parentNode: Node. node to remove the children from
+        :param position: int. starting row position to remove
+        :param count: int. number of rows to remove
+        :param parent: QUndoCommand. parent command
+        """
+        super(RemoveNodesCommand, self).__init__(parent)
+        self._model = model
+        self._parentNode = parentNode
+        self._position = position
+        self._count = count
+        self._nodes = list()
+
+        self.setText('Remove {} node(s)'.format(count))
+
+    def redo(self):
+        self._nodes = self._model.takeNodes(
+            self._parentNode, self._position, self._count)
+
+    def undo(self):
+        self._model.insertNodes(self._parentNode, self._position, self._nodes)
+        self._nodes = list()
@@ -16,12 +16,16 @@ import os
 import sys
 
 from Qt import QtWidgets, QtCore, QtGui, QtXml
-from Qt import _loadUi
 
 import node
-import highlighter
+import snapshot
+import uiLoader
 import model
+import query
 import dataMapperWidget
+import expansion
+import xmlExport
+import xmlViewer
 
 
 MODULE_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -31,7 +35,7 @@ UI_FOLDER = os.path.join(MODULE_PATH, 'ui')
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self, parent=None):
         super(MainWindow, self).__init__(parent)
-        _loadUi(os.path.join(UI_FOLDER, 'mainWindow.ui'), self)
+        uiLoader.loadUi(os.path.join(UI_FOLDER, 'mainWindow.ui'), self)
 
         # node and model setup
         self._rootNode = node.Node("Root")
@@ -47,8 +51,14 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self._model = model.SceneGraphModel(self._rootNode, self)
 
-        # proxy model
-        self._proxyModel = QtCore.QSortFilterProxyModel(self)
+        # snapshots of the scene for the xml exports, so edits made while
+        # exporting don't leak in; connected first to be updated before the
+        # other slots of the model signals run
+        self._snapshots = snapshot.SceneSnapshots(self._model, self)
+
+        # proxy model, filtering by the regular expression of the filter
+        # field, or by a query.Query passed to setQuery()
+        self._proxyModel = query.QueryFilterProxyModel(self)
         self._proxyModel.setSourceModel(self._model)
         self._proxyModel.setDynamicSortFilter(True)
         self._proxyModel.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
@@ -58,51 +68,201 @@ class MainWindow(QtWidgets.QMainWindow):
         
         self.uiTree.setModel(self._proxyModel)
 
+        # every row has the same height, the view only measures the first
+        # one instead of every row on layout
+        self.uiTree.setUniformRowHeights(True)
+        # the editors edit all the selected nodes at once
+        self.uiTree.setSelectionMode(
+            QtWidgets.QAbstractItemView.ExtendedSelection)
+        header = self.uiTree.header()
+        header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        header.setDefaultSectionSize(model.SECTION_WIDTH)
+        header.setStretchLastSection(True)
+
+        # expand/collapse in batches, the expanded paths are kept across
+        # filter changes and model resets
+        self._expansion = expansion.ExpansionManager(self.uiTree)
+        self.uiTree.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+        for text, slot in (
+                ('Expand All', lambda: self._expansion.expandToDepth(-1)),
+                ('Collapse All', lambda: self._expansion.collapseAll()),
+                ('Expand Selected', lambda: self._expansion.expandToDepth(
+                    -1, self.uiTree.currentIndex())),
+                ('Collapse Selected', lambda: self._expansion.collapseAll(
+                    self.uiTree.currentIndex()))):
+            action = QtWidgets.QAction(text, self.uiTree)
+            action.triggered.connect(slot)
+            self.uiTree.addAction(action)
+
         # add container layout for holding property widget
         self._propEditor = PropertyContainerWidget(self._proxyModel, self)
         self.layoutMain.addWidget(self._propEditor)
 
-        # for xml highlighting
-        highlighter.XMLHighlighter(self.uiXml.document())
+        # xml panel, only the visible lines are computed from the nodes, it
+        # follows the changes of the model by itself
+        self.uiXml = xmlViewer.XmlViewer(self)
+        self.layoutMain.insertWidget(0, self.uiXml)
 
         # connect signals
-        self._model.dataChanged.connect(self.updateXml)
+        self.uiTree.selectionModel().currentChanged.connect(self.scrollXml)
+        self.uiTree.selectionModel().selectionChanged.connect(
+            self.updateEditGroup)
         self.uiTree.selectionModel().currentChanged.connect(self._propEditor.setSelection)
         self.uiFilter.textChanged.connect(self._proxyModel.setFilterRegExp)
 
+        # undo/redo actions of the model's edit history
+        undoStack = self._model.undoStack()
+        undoAction = undoStack.createUndoAction(self, 'Undo')
+        undoAction.setShortcut(QtGui.QKeySequence.Undo)
+        redoAction = undoStack.createRedoAction(self, 'Redo')
+        redoAction.setShortcut(QtGui.QKeySequence.Redo)
+        self.addAction(undoAction)
+        self.addAction(redoAction)
+
+        # the editors commit on focus out, or with this action under the
+        # manual commit policy
+        commitAction = QtWidgets.QAction('Commit Edits', self)
+        commitAction.setShortcut(QtGui.QKeySequence('Ctrl+Return'))
+        commitAction.triggered.connect(self._propEditor.commit)
+        self.addAction(commitAction)
+
+        # xml export in slices into a file
+        self._exportJob = None
+        exportAction = QtWidgets.QAction('Export XML...', self)
+        exportAction.setShortcut(QtGui.QKeySequence('Ctrl+E'))
+        exportAction.triggered.connect(self.exportXml)
+        # only enabled while exporting, Escape stays with the editors and
+        # dialogs otherwise
+        self._cancelExportAction = QtWidgets.QAction('Cancel Export', self)
+        self._cancelExportAction.setShortcut(QtGui.QKeySequence('Escape'))
+        self._cancelExportAction.setEnabled(False)
+        self._cancelExportAction.triggered.connect(self.cancelExport)
+        self.addAction(exportAction)
+        self.addAction(self._cancelExportAction)
+
         # initialize xml
         self.updateXml()
 
     def updateXml(self):
         """
-        Refresh xml ui field with the xml formatting from the lastest node
-        attribute dictionary
+        Refresh xml ui field with the nodes of the model, the text of the
+        lines is only computed when they are displayed
+        """
+        self.uiXml.setModel(self._model)
+
+    def updateEditGroup(self, selected=None, deselected=None):
+        """
+        Make the selected nodes edited together by the property editors,
+        see SceneGraphModel.setEditGroup()
+
+        the selection changes before the current index, the pending edits
+        are committed first so they go to the nodes they were made for
+        instead of the new selection
+        """
+        self._propEditor.commit()
+        rows = self.uiTree.selectionModel().selectedRows(0)
+        self._model.setEditGroup(
+            self._proxyModel.mapToSource(index).internalPointer()
+            for index in rows)
+
+    def scrollXml(self, current, old=None):
+        """
+        Scroll the xml to the element of the current node
+
+        :param current: QModelIndex. current index of the tree
+        :param old: QModelIndex. previous index
+        """
+        currentNode = self._proxyModel.mapToSource(current).internalPointer()
+        if currentNode:
+            self.uiXml.scrollToRows(node.rowPath(currentNode))
+
+    def exportXml(self, path=None):
+        """
+        Write the xml of the scene into a file, the progress is shown in the
+        status bar
+
+        :param path: str. file to write, asked with a dialog if None
+        """
+        if not path:
+            path, fileFilter = QtWidgets.QFileDialog.getSaveFileName(
+                self, 'Export XML', MODULE_PATH, 'XML (*.xml)')
+            if not path:
+                return
+
+        self.cancelExport()
+        statusBar = self.statusBar()
+        self._exportJob = xmlExport.XmlExportJob(
+            self._snapshots.snapshot(), path, parent=self)
+        self._exportJob.progress.connect(
+            lambda done, total: statusBar.showMessage(
+                'Exporting {}/{} nodes...'.format(done, total)))
+        self._exportJob.finished.connect(
+            lambda path: statusBar.showMessage('Exported ' + path, 5000))
+        self._exportJob.canceled.connect(
+            lambda: statusBar.showMessage('Export canceled', 5000))
+        self._exportJob.failed.connect(
+            lambda error: statusBar.showMessage('Export failed: ' + error))
+        for signal in (self._exportJob.finished, self._exportJob.canceled,
+                       self._exportJob.failed):
+            signal.connect(
+                lambda *args: self._cancelExportAction.setEnabled(False))
+        # enabled first, the job fails right away if the file can't be
+        # opened
+        self._cancelExportAction.setEnabled(True)
+        self._exportJob.start()
+
+    def cancelExport(self):
         """
-        xml = self._rootNode.asXml()
-        self.uiXml.setPlainText(xml)
+        Stop the running file export, if any
+        """
+        if self._exportJob is not None:
+            self._exportJob.cancel()
+            self._exportJob.deleteLater()
+            self._exportJob = None
 
 
 class PropertyContainerWidget(QtWidgets.QWidget):
     def __init__(self, model, parent=None):
         super(PropertyContainerWidget, self).__init__(parent)
-        _loadUi(os.path.join(UI_FOLDER, 'mainLayout.ui'), self)
+        uiLoader.loadUi(os.path.join(UI_FOLDER, 'mainLayout.ui'), self)
 
         self._proxyModel = model
 
+        # the node editor is always displayed
         self._nodeEditor = dataMapperWidget.NodeEditor(model, self)
-        self._lightEditor = dataMapperWidget.LightEditor(model, self)
-        self._cameraEditor = dataMapperWidget.CameraEditor(model, self)
-        self._transformEditor = dataMapperWidget.TransformEditor(model, self)
-
-        # add widget and hide them
         self.layoutNode.addWidget(self._nodeEditor)
-        self.layoutSpecs.addWidget(self._lightEditor)
-        self.layoutSpecs.addWidget(self._cameraEditor)
-        self.layoutSpecs.addWidget(self._transformEditor)
 
-        self._lightEditor.setVisible(False)
-        self._cameraEditor.setVisible(False)
-        self._transformEditor.setVisible(False)
+        # only the mappers of the displayed editors follow the selection
+        self._mappers = dataMapperWidget.MapperManager(self)
+        self._mappers.addEditor(self._nodeEditor)
+
+        # type specific editors are built on first selection and kept in
+        # the pool, the stack only shows the one of the current node type;
+        # the empty page is shown for types without an editor
+        self._editors = dict()
+        self._editorStack = QtWidgets.QStackedWidget(self)
+        self._emptyPage = QtWidgets.QWidget(self._editorStack)
+        self._editorStack.addWidget(self._emptyPage)
+        self.layoutSpecs.addWidget(self._editorStack)
+
+    def editor(self, ntype):
+        """
+        Custom: get the pooled editor of the node type, building it the
+        first time it is requested
+
+        :param ntype: str. node type
+        :return: DataMapperWidget. editor of the type, None if not registered
+        """
+        editor = self._editors.get(ntype)
+        if editor is None:
+            editorClass = dataMapperWidget.EDITOR_TYPES.get(ntype)
+            if editorClass is None:
+                return None
+            editor = editorClass(self._proxyModel, self._editorStack)
+            self._editorStack.addWidget(editor)
+            self._editors[ntype] = editor
+            self._mappers.addEditor(editor)
+        return editor
 
     def setSelection(self, current, old):
         """
@@ -120,29 +280,40 @@ class PropertyContainerWidget(QtWidgets.QWidget):
         currentIndex = self._proxyModel.mapToSource(current)
         currentNode = currentIndex.internalPointer()
 
-        # node editor always get displayed
-        self._nodeEditor.setSelection(currentIndex)
+        ntype = currentNode.type if currentNode else None
+        editor = self.editor(ntype)
+        if editor is None:
+            self._editorStack.setCurrentWidget(self._emptyPage)
+        else:
+            self._editorStack.setCurrentWidget(editor)
+
+        # the node editor is always displayed, the stack hides the others
+        self._mappers.setCurrentIndex(currentIndex)
 
-        self._cameraEditor.setVisible(False)
-        self._lightEditor.setVisible(False)
-        self._transformEditor.setVisible(False)
+    def setCommitPolicy(self, policy, rate=dataMapperWidget.COMMIT_RATE):
+        """
+        Custom: when the editors commit their edits, see
+        DataMapperWidget.setCommitPolicy()
+        """
+        self._mappers.setCommitPolicy(policy, rate)
 
-        ntype = currentNode.type if currentNode else None
-        if ntype == "camera":
-            self._cameraEditor.setVisible(True)
-            self._cameraEditor.setSelection(currentIndex)
-        
-        elif ntype == "light":
-            self._lightEditor.setVisible(True)
-            self._lightEditor.setSelection(currentIndex)
-             
-        elif ntype == "transform":
-            self._transformEditor.setVisible(True)
-            self._transformEditor.setSelection(currentIndex)
+    def commit(self):
+        """
+        Custom: commit the pending edits of the editors
+        """
+        self._mappers.commit()
 
 
 if __name__ == '__main__':
     app = QtWidgets.QApplication(sys.argv)
+
+    # opt-in profiling, e.g. MODEL_PROFILE=stats.json python view.py
+    statsFile = os.environ.get('MODEL_PROFILE')
+    if statsFile:
+        import profiler
+        profile = profiler.Profiler()
+        profiler.instrumentScene(profile, MainWindow)
+        app.aboutToQuit.connect(lambda: profile.dump(statsFile))
     
     wnd = MainWindow()
     wnd.show()
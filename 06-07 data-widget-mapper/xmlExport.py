@@ -0,0 +1,174 @@
+"""
+The export job writes the xml of a node hierarchy in slices on the GUI
+thread, so big scenes don't freeze the window while being serialized
+
+every tick of the job writes nodes until the time budget of the tick is
+spent, then gives the control back to the event loop; the job reports its
+progress, can be canceled at any time, and writes either into a file or
+into a string handed over by the finished signal; any error while writing
+(e.g. a full disk) stops the job, removes the partial file and emits failed
+
+the root can be a live Node, nodes edited before being reached are then
+written with their new values, or a snapshot.FrozenNode to export the
+state of the scene at the time the job was created
+
+example:
+    job = XmlExportJob(rootNode, 'scene.xml')
+    job.progress.connect(progressBar.setValue)
+    job.finished.connect(onFinished)
+    job.start()
+"""
+
+import timeit
+
+from Qt import QtCore
+
+import node
+
+
+TIME_BUDGET = 0.008
+INDENT = 4
+
+
+class XmlExportJob(QtCore.QObject):
+    # nodes written, total number of nodes
+    progress = QtCore.Signal(int, int)
+    # xml text, or the file path when exporting to a file
+    finished = QtCore.Signal(str)
+    canceled = QtCore.Signal()
+    failed = QtCore.Signal(str)
+
+    def __init__(self, rootNode, path=None, indent=INDENT,
+                 budget=TIME_BUDGET, parent=None):
+        """
+        Initialization
+
+        :param rootNode: Node or FrozenNode. top of the hierarchy to export
+        :param path: str. file to write, None to export into a string
+        :param indent: int. spaces per level, see Node.asXml()
+        :param budget: float. seconds of work per tick
+        :param parent: QObject. parent object
+        """
+        super(XmlExportJob, self).__init__(parent)
+        self._rootNode = rootNode
+        self._path = path
+        self._indent = indent
+        self._budget = budget
+
+        self._output = None
+        self._writer = None
+        self._steps = None
+        self._total = 0
+        self._done = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._tick)
+
+    def isRunning(self):
+        return self._timer.isActive()
+
+    def start(self):
+        """
+        Open the output and start the ticks, the nodes are counted in the
+        first ticks to report the progress
+        """
+        if self._path is not None:
+            self._output = QtCore.QFile(self._path)
+            if not self._output.open(
+                    QtCore.QIODevice.WriteOnly | QtCore.QIODevice.Truncate):
+                self.failed.emit(self._output.errorString())
+                return
+            self._writer = QtCore.QXmlStreamWriter(self._output)
+        else:
+            self._output = QtCore.QByteArray()
+            self._writer = QtCore.QXmlStreamWriter(self._output)
+        self._writer.setAutoFormatting(self._indent > 0)
+        self._writer.setAutoFormattingIndent(self._indent)
+
+        self._steps = self._run()
+        self._timer.start()
+
+    def _run(self):
+        """
+        Generator of the whole export, yielding after each node
+        """
+        self._total = 0
+        for current, depth in self._rootNode.walk():
+            self._total += 1
+            yield
+
+        if self._path is not None:
+            self._writer.writeStartDocument()
+        for self._done in self._rootNode.writeXml(self._writer):
+            yield
+        if self._path is not None:
+            self._writer.writeEndDocument()
+
+    def _tick(self):
+        timer = timeit.default_timer
+        end = timer() + self._budget
+        try:
+            while timer() < end:
+                next(self._steps)
+        except StopIteration:
+            self._finish()
+            return
+        except Exception as error:
+            # the timer would keep calling a broken generator
+            self._fail('{}'.format(error))
+            return
+        if self._writer.hasError():
+            self._fail(self._errorString())
+            return
+        self.progress.emit(self._done, self._total)
+
+    def _errorString(self):
+        if self._path is not None:
+            return self._output.errorString()
+        return 'the xml could not be written'
+
+    def _finish(self):
+        # the writer only reports the failed writes, e.g. a full disk, the
+        # data still buffered by the file is written by flush()
+        flushed = self._path is None or self._output.flush()
+        if self._writer.hasError() or not flushed:
+            self._fail(self._errorString())
+            return
+
+        self.progress.emit(self._total, self._total)
+        if self._path is not None:
+            self._stop(remove=False)
+            self.finished.emit(self._path)
+        else:
+            text = node.xmlText(self._output)
+            self._stop(remove=False)
+            self.finished.emit(text)
+
+    def _fail(self, error):
+        self._stop(remove=True)
+        self.failed.emit(error)
+
+    def _stop(self, remove):
+        """
+        Stop the ticks and close the output
+
+        :param remove: bool. remove the written file
+        """
+        self._timer.stop()
+        self._steps = None
+        if self._path is not None:
+            self._output.close()
+            if remove:
+                self._output.remove()
+        self._output = None
+        self._writer = None
+
+    def cancel(self):
+        """
+        Stop the export, the partially written file is removed
+        """
+        if self._steps is None:
+            return
+        self._stop(remove=True)
+        self.canceled.emit()
@@ -0,0 +1,443 @@
+"""
+Virtualized xml viewer of a node hierarchy
+
+instead of laying out the whole asXml() string in a text document, the
+viewer computes the text of a line only when it is painted, straight from
+the live nodes: line numbers are resolved into nodes with the number of
+lines of their subtrees, so the memory follows the viewport rather than the
+size of the scene
+
+the displayed text is the same as Node.asXml() with its default indent:
+one line per element without children, an opening and a closing line per
+element with children
+
+the subtree line counts and the line offsets of the children are cached
+per node, around the viewport only: the counts of the nodes on the path
+down to the first visible line and of their children, and the offsets of
+the nodes on that path. Following a model (see setModel()), the inserted
+and removed rows shift the cached counts of their ancestors instead of
+counting the hierarchy again
+
+example:
+    viewer = XmlViewer()
+    viewer.setModel(sceneGraphModel)
+    viewer.scrollToRows([5, 0])
+"""
+
+import bisect
+
+from Qt import QtCore, QtGui, QtWidgets
+
+import node
+
+
+INDENT = 4
+# the caches are pruned down to the viewport when they hold this many times
+# the entries left by their last pruning
+PRUNE_RATIO = 2
+PRUNE_MINIMUM = 1024
+
+OPEN, CLOSE = range(2)
+
+
+def escapeAttribute(value):
+    """
+    :param value: value of an attribute
+    :return: str. text of the value as written by QXmlStreamWriter
+    """
+    text = node.xmlValue(value)
+    return (text.replace('&', '&amp;').replace('<', '&lt;')
+            .replace('>', '&gt;').replace('"', '&quot;'))
+
+
+class XmlViewer(QtWidgets.QAbstractScrollArea):
+    def __init__(self, parent=None):
+        super(XmlViewer, self).__init__(parent)
+        self._root = None
+        self._model = None
+        self._lineCountCache = dict()
+        self._pruneSize = PRUNE_MINIMUM
+        self._offsetCache = dict()
+        # lines of the rows about to be removed
+        self._removedLines = 0
+        self._currentLine = -1
+        self._textWidth = 0
+
+        font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
+        self.setFont(font)
+        self._setupFormats()
+
+    def _setupFormats(self):
+        """
+        Fonts and colors of the tokens, the same as XMLHighlighter
+        """
+        font = self.font()
+        bold = QtGui.QFont(font)
+        bold.setBold(True)
+        italic = QtGui.QFont(font)
+        italic.setItalic(True)
+
+        # token kind -> (font, color, metrics)
+        self._formats = dict()
+        for kind, tokenFont, color in (
+                ('plain', font, self.palette().color(QtGui.QPalette.Text)),
+                ('keyword', bold, QtGui.QColor(QtCore.Qt.darkMagenta)),
+                ('element', bold, QtGui.QColor(QtCore.Qt.green)),
+                ('attribute', italic, QtGui.QColor(QtCore.Qt.blue)),
+                ('value', font, QtGui.QColor(QtCore.Qt.red))):
+            self._formats[kind] = (
+                tokenFont, color, QtGui.QFontMetrics(tokenFont))
+
+        metrics = QtGui.QFontMetrics(font)
+        self._lineHeight = metrics.height()
+        self._indentWidth = self._advance(metrics, ' ' * INDENT)
+
+    @staticmethod
+    def _advance(metrics, text):
+        if hasattr(metrics, 'horizontalAdvance'):
+            return metrics.horizontalAdvance(text)
+        return metrics.width(text)
+
+    # ------------ Line counts ---------------#
+
+    def _cachedLineCount(self, currentNode):
+        if not currentNode.childCount:
+            return 1
+        entry = self._lineCountCache.get(id(currentNode))
+        # the entry keeps its node alive, so its id can't be reused
+        if entry is not None and entry[0] is currentNode:
+            return entry[1]
+        return None
+
+    def lineCount(self, currentNode=None):
+        """
+        :param currentNode: Node. top of a subtree, the root if None
+        :return: int. number of lines of the subtree
+        """
+        if currentNode is None:
+            currentNode = self._root
+            if currentNode is None:
+                return 0
+
+        count = self._cachedLineCount(currentNode)
+        if count is not None:
+            return count
+
+        # children first, only the elements with children are cached
+        stack = [(currentNode, False)]
+        while stack:
+            current, visited = stack.pop()
+            children = map(current.child, range(current.childCount))
+            if visited:
+                count = 2 + sum(map(self._cachedLineCount, children))
+                self._lineCountCache[id(current)] = (current, count)
+                continue
+            if self._cachedLineCount(current) is not None:
+                continue
+            stack.append((current, True))
+            stack.extend((child, False) for child in children
+                         if child.childCount)
+        return self._cachedLineCount(currentNode)
+
+    def _offsets(self, currentNode):
+        """
+        :return: list. line of each child relative to the opening line of
+        the node
+        """
+        entry = self._offsetCache.get(id(currentNode))
+        if entry is not None and entry[0] is currentNode:
+            return entry[1]
+
+        offsets = list()
+        line = 1
+        for row in range(currentNode.childCount):
+            offsets.append(line)
+            line += self.lineCount(currentNode.child(row))
+        self._offsetCache[id(currentNode)] = (currentNode, offsets)
+        return offsets
+
+    def _pruneCaches(self, path):
+        """
+        Drop the cached entries away from the path once the caches grew too
+        large, the counts of the nodes of the path and of their children
+        and the offsets of the nodes of the path are kept
+
+        :param path: list. (node, row) pairs, see _locate()
+        """
+        if (len(self._lineCountCache) + len(self._offsetCache)
+                <= self._pruneSize):
+            return
+
+        pathIds = set(id(current) for current, row in path)
+        self._lineCountCache = dict(
+            (key, entry) for key, entry in self._lineCountCache.items()
+            if key in pathIds or id(entry[0].parent) in pathIds)
+        self._offsetCache = dict(
+            (key, entry) for key, entry in self._offsetCache.items()
+            if key in pathIds)
+        self._pruneSize = max(PRUNE_MINIMUM, PRUNE_RATIO * (
+            len(self._lineCountCache) + len(self._offsetCache)))
+
+    def _addLines(self, currentNode, lines):
+        """
+        Shift the cached line counts of the node and of its ancestors, the
+        offsets of their children are computed again
+        """
+        while currentNode is not None:
+            key = id(currentNode)
+            entry = self._lineCountCache.get(key)
+            if entry is not None and entry[0] is currentNode:
+                self._lineCountCache[key] = (currentNode, entry[1] + lines)
+            self._offsetCache.pop(key, None)
+            currentNode = currentNode.parent
+
+        self._updateScrollBars()
+        self.viewport().update()
+
+    # ------------ Model ---------------#
+
+    def setModel(self, model):
+        """
+        Display the hierarchy of a model and follow its changes
+
+        :param model: SceneGraphModel. model of the hierarchy, None to clear
+        """
+        if self._model is not None:
+            for signal, slot in self._modelSlots(self._model):
+                signal.disconnect(slot)
+        self._model = model
+        if model is None:
+            self.setRoot(None)
+            return
+
+        for signal, slot in self._modelSlots(model):
+            signal.connect(slot)
+        self.setRoot(model.getNode(QtCore.QModelIndex()))
+
+    def model(self):
+        return self._model
+
+    def _modelSlots(self, model):
+        return ((model.dataChanged, self._onDataChanged),
+                (model.rowsInserted, self._onRowsInserted),
+                (model.rowsAboutToBeRemoved, self._onRowsAboutToBeRemoved),
+                (model.rowsRemoved, self._onRowsRemoved),
+                (model.modelReset, self._onModelReset))
+
+    def _rowLines(self, parentNode, first, last):
+        """
+        :return: int. lines of the rows, with the closing line of the
+        parent when they are all its children
+        """
+        lines = sum(self.lineCount(parentNode.child(row))
+                    for row in range(first, last + 1))
+        if parentNode.childCount == last - first + 1:
+            lines += 1
+        return lines
+
+    def _onDataChanged(self, topLeft, bottomRight, roles=()):
+        # the values don't change the number of lines
+        self.viewport().update()
+
+    def _onRowsInserted(self, parent, first, last):
+        parentNode = self._model.getNode(parent)
+        self._addLines(parentNode, self._rowLines(parentNode, first, last))
+
+    def _onRowsAboutToBeRemoved(self, parent, first, last):
+        self._removedLines = self._rowLines(
+            self._model.getNode(parent), first, last)
+
+    def _onRowsRemoved(self, parent, first, last):
+        self._addLines(self._model.getNode(parent), -self._removedLines)
+
+    def _onModelReset(self):
+        self.setRoot(self._model.getNode(QtCore.QModelIndex()))
+
+    # ------------ Lines <-> Nodes ---------------#
+
+    def setRoot(self, rootNode):
+        """
+        Display a hierarchy, the scroll position is kept; the changes made
+        to the nodes afterwards are only displayed when they go through the
+        model given to setModel()
+
+        :param rootNode: Node. root of the hierarchy, None to clear
+        """
+        self._root = rootNode
+        self._lineCountCache = dict()
+        self._offsetCache = dict()
+        self._pruneSize = PRUNE_MINIMUM
+        if rootNode is not None:
+            self.lineCount(rootNode)
+            self._pruneCaches([(rootNode, -1)])
+
+        self._updateScrollBars()
+        self.viewport().update()
+
+    def root(self):
+        return self._root
+
+    def _locate(self, line):
+        """
+        :return: list. (node, row) pairs from the root down to the element
+        of the line, the row of the root being -1, and whether the line is
+        the opening or the closing one
+        """
+        current = self._root
+        path = [(current, -1)]
+        while line:
+            if line == self.lineCount(current) - 1:
+                self._pruneCaches(path)
+                return path, CLOSE
+            offsets = self._offsets(current)
+            row = bisect.bisect_right(offsets, line) - 1
+            line -= offsets[row]
+            current = current.child(row)
+            path.append((current, row))
+        self._pruneCaches(path)
+        return path, OPEN
+
+    def lineForRows(self, rows):
+        """
+        :param rows: list. row numbers from the root, see node.rowPath()
+        :return: int. opening line of the element
+        """
+        line = 0
+        current = self._root
+        for row in rows:
+            line += self._offsets(current)[row]
+            current = current.child(row)
+        return line
+
+    def _lines(self, first, count):
+        """
+        Generate the (depth, node, OPEN/CLOSE) of the lines from the first
+        one, walking from line to line instead of locating each of them
+        """
+        total = self.lineCount()
+        if first >= total:
+            return
+        path, kind = self._locate(first)
+        for line in range(first, min(first + count, total)):
+            current = path[-1][0]
+            yield len(path) - 1, current, kind
+
+            if kind == OPEN and current.childCount:
+                path.append((current.child(0), 0))
+                continue
+
+            # next sibling, or closing line of the parent
+            if len(path) == 1:
+                return
+            row = path.pop()[1]
+            parentNode = path[-1][0]
+            if row + 1 < parentNode.childCount:
+                path.append((parentNode.child(row + 1), row + 1))
+                kind = OPEN
+            else:
+                kind = CLOSE
+
+    def _tokens(self, currentNode, kind):
+        if kind == CLOSE:
+            return [('keyword', '</'), ('element', currentNode.type),
+                    ('keyword', '>')]
+
+        tokens = [('keyword', '<'), ('element', currentNode.type)]
+        if currentNode is not self._root:
+            for k, v in currentNode.attrs().items():
+                tokens.extend((
+                    ('plain', ' '), ('attribute', k), ('plain', '='),
+                    ('value', '"{}"'.format(escapeAttribute(v)))))
+        tokens.append(('keyword', '>' if currentNode.childCount else '/>'))
+        return tokens
+
+    def lineText(self, line):
+        """
+        :param line: int. line number
+        :return: str. text of the line, as in Node.asXml()
+        """
+        for depth, currentNode, kind in self._lines(line, 1):
+            return ' ' * (INDENT * depth) + ''.join(
+                text for token, text in self._tokens(currentNode, kind))
+        return ''
+
+    # ------------ Scrolling/Painting ---------------#
+
+    def scrollToRows(self, rows):
+        """
+        Scroll to the element of the rows and mark its opening line
+
+        :param rows: list. row numbers from the root, see node.rowPath()
+        """
+        if self._root is None:
+            return
+        self._currentLine = self.lineForRows(rows)
+        scrollBar = self.verticalScrollBar()
+        visible = self._visibleLineCount()
+        if not (scrollBar.value() <= self._currentLine
+                < scrollBar.value() + visible - 1):
+            scrollBar.setValue(self._currentLine - visible // 2)
+        self.viewport().update()
+
+    def _visibleLineCount(self):
+        return max(1, self.viewport().height() // self._lineHeight)
+
+    def _updateScrollBars(self):
+        visible = self._visibleLineCount()
+        scrollBar = self.verticalScrollBar()
+        scrollBar.setRange(0, max(0, self.lineCount() - visible))
+        scrollBar.setPageStep(visible)
+        scrollBar.setSingleStep(1)
+
+        width = self.viewport().width()
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, self._textWidth - width))
+        horizontal.setPageStep(width)
+        horizontal.setSingleStep(self._indentWidth)
+
+    def resizeEvent(self, event):
+        super(XmlViewer, self).resizeEvent(event)
+        self._updateScrollBars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        """
+        Override: only the visible lines are computed and painted
+        """
+        if self._root is None:
+            return
+
+        painter = QtGui.QPainter(self.viewport())
+        first = self.verticalScrollBar().value()
+        left = -self.horizontalScrollBar().value()
+        count = self._visibleLineCount() + 1
+        textWidth = self._textWidth
+
+        plainFont, plainColor, plainMetrics = self._formats['plain']
+        y = 0
+        for line, (depth, currentNode, kind) in enumerate(
+                self._lines(first, count), first):
+            if line == self._currentLine:
+                painter.fillRect(
+                    0, y, self.viewport().width(), self._lineHeight,
+                    self.palette().color(QtGui.QPalette.AlternateBase))
+
+            x = left + depth * self._indentWidth
+            baseline = y + plainMetrics.ascent()
+            for token, text in self._tokens(currentNode, kind):
+                font, color, metrics = self._formats[token]
+                painter.setFont(font)
+                painter.setPen(color)
+                painter.drawText(x, baseline, text)
+                x += self._advance(metrics, text)
+            textWidth = max(textWidth, x - left)
+            y += self._lineHeight
+
+        painter.end()
+
+        # the width of the lines is only known once painted
+        if textWidth != self._textWidth:
+            self._textWidth = textWidth
+            self._updateScrollBars()
@@ -0,0 +1,141 @@
+"""
+Benchmarks of the palette list and table models: data() over every role,
+row/column insertion and removal, recoloring and the painting of the swatch
+grid
+
+every benchmark takes the number of swatches and returns the elapsed
+seconds of the measured part only
+"""
+
+import math
+import time
+
+import common
+
+
+ROLES = None
+
+
+def _roles():
+    global ROLES
+    if ROLES is None:
+        from Qt import QtCore
+        ROLES = (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole,
+                 QtCore.Qt.ToolTipRole, QtCore.Qt.DecorationRole)
+    return ROLES
+
+
+def _colors(count):
+    from Qt import QtGui
+    return [QtGui.QColor.fromRgb((i * 2654435761) & 0xFFFFFF)
+            for i in range(count)]
+
+
+def _listModel(count):
+    common.application()
+    module = common.loadModule('paletteList', common.LIST_VIEW_FILE)
+    return module.PaletteListModel(_colors(count))
+
+
+def _tableModel(count, indexed=False, distinct=None):
+    common.application()
+    module = common.loadModule('paletteTable', common.TABLE_VIEW_FILE)
+    columns = 10
+    rows = max(1, count // columns)
+    colors = _colors(rows * columns if distinct is None else distinct)
+    data = [[colors[(row * columns + column) % len(colors)]
+             for column in range(columns)] for row in range(rows)]
+    return module.PaletteTableModel(
+        data, ['Palette'] * columns, indexed=indexed)
+
+
+def listData(count):
+    model = _listModel(count)
+    roles = _roles()
+    start = time.perf_counter()
+    for row in range(count):
+        index = model.index(row, 0)
+        for role in roles:
+            model.data(index, role)
+    return time.perf_counter() - start
+
+
+def listInsertRemove(count):
+    model = _listModel(count)
+    rows = max(1, int(math.sqrt(count)))
+    start = time.perf_counter()
+    for _ in range(rows):
+        model.insertRows(count // 2, 1)
+    for _ in range(rows):
+        model.removeRows(count // 2, 1)
+    return time.perf_counter() - start
+
+
+def tableData(count):
+    model = _tableModel(count)
+    roles = _roles()
+    rows = model.rowCount(None)
+    columns = model.columnCount(None)
+    start = time.perf_counter()
+    for row in range(rows):
+        for column in range(columns):
+            index = model.index(row, column)
+            for role in roles:
+                model.data(index, role)
+    return time.perf_counter() - start
+
+
+def tableInsert(count):
+    model = _tableModel(count)
+    rows = max(1, int(math.sqrt(count)) // 10)
+    start = time.perf_counter()
+    model.insertRows(model.rowCount(None) // 2, rows)
+    model.insertColumns(0, 1)
+    return time.perf_counter() - start
+
+
+def tableRecolor(count):
+    """
+    Recolor a palette of 16 colors back and forth in indexed mode
+    """
+    model = _tableModel(count, indexed=True, distinct=16)
+    colors = _colors(16)
+    start = time.perf_counter()
+    for color in colors:
+        model.recolor(color, '#ffffff')
+        model.recolor('#ffffff', color)
+    return time.perf_counter() - start
+
+
+def tableGridPaint(count):
+    """
+    Paint the swatch grid page by page down the palette, every page
+    rendering the tiles coming into view, then once more from the tiles cache
+    """
+    model = _tableModel(count)
+    module = common.loadModule('paletteTable', common.TABLE_VIEW_FILE)
+    view = module.SwatchGridView()
+    view.resize(800, 600)
+    view.setModel(model)
+    view.show()
+    # the repaints are no-ops until the window is exposed
+    common.application().processEvents()
+    scrollBar = view.verticalScrollBar()
+    values = range(0, scrollBar.maximum() + 1, scrollBar.pageStep())
+    start = time.perf_counter()
+    for value in list(values) * 2:
+        scrollBar.setValue(value)
+        view.viewport().repaint()
+    elapsed = time.perf_counter() - start
+    view.close()
+    return elapsed
+
+
+BENCHMARKS = [
+    ('palette.list.data', listData),
+    ('palette.list.insertRemove', listInsertRemove),
+    ('palette.table.data', tableData),
+    ('palette.table.insert', tableInsert),
+    ('palette.table.recolor', tableRecolor),
+    ('palette.table.gridPaint', tableGridPaint),
+]
@@ -0,0 +1,120 @@
+"""
+Benchmarks of the scene graph: index()/parent() walks through the model,
+filter proxy keystrokes, xml export, xml highlighting and the virtualized
+xml viewer
+
+every benchmark takes the number of nodes and returns the elapsed seconds
+of the measured part only
+"""
+
+import time
+
+import common
+
+
+def _model(count):
+    common.application()
+    common.useExample()
+    import model
+
+    return model.SceneGraphModel(common.buildScene(count))
+
+
+def indexParentWalk(count):
+    """
+    Visit every index of the model through index()/rowCount() the way a view
+    does, and ask each index for its parent
+    """
+    from Qt import QtCore
+
+    sceneModel = _model(count)
+    start = time.perf_counter()
+    stack = [QtCore.QModelIndex()]
+    while stack:
+        parent = stack.pop()
+        for row in range(sceneModel.rowCount(parent)):
+            index = sceneModel.index(row, 0, parent)
+            sceneModel.parent(index)
+            stack.append(index)
+    return time.perf_counter() - start
+
+
+def filterKeystrokes(count):
+    """
+    Type a filter word one character at a time into the filter proxy
+    """
+    from Qt import QtCore
+    import model
+    import query
+
+    sceneModel = _model(count)
+    proxyModel = query.QueryFilterProxyModel()
+    proxyModel.setSourceModel(sceneModel)
+    proxyModel.setDynamicSortFilter(True)
+    proxyModel.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+    proxyModel.setFilterRole(model.SceneGraphModel.filterRole)
+    proxyModel.setFilterKeyColumn(0)
+
+    word = 'light'
+    start = time.perf_counter()
+    for i in range(len(word) + 1):
+        proxyModel.setFilterRegExp(word[:i])
+        proxyModel.rowCount(QtCore.QModelIndex())
+    return time.perf_counter() - start
+
+
+def asXml(count):
+    root = common.buildScene(count)
+    start = time.perf_counter()
+    root.asXml()
+    return time.perf_counter() - start
+
+
+def highlightXml(count):
+    """
+    Highlight the whole xml document of a scene of the given size
+    """
+    from Qt import QtGui
+    import highlighter
+
+    common.application()
+    text = common.buildScene(count).asXml()
+    document = QtGui.QTextDocument()
+    document.setPlainText(text)
+    xmlHighlighter = highlighter.XMLHighlighter(document)
+    start = time.perf_counter()
+    xmlHighlighter.rehighlight()
+    return time.perf_counter() - start
+
+
+def xmlViewerEdits(count):
+    """
+    Display a scene in the xml viewer, then edit a node and read a screen of
+    lines from the middle 100 times
+    """
+    from Qt import QtCore
+
+    sceneModel = _model(count)
+    import xmlViewer
+
+    viewer = xmlViewer.XmlViewer()
+    column = sceneModel.columnForAttr('name')
+    index = sceneModel.index(0, column, QtCore.QModelIndex())
+
+    start = time.perf_counter()
+    viewer.setModel(sceneModel)
+    for i in range(100):
+        sceneModel.setData(index, 'edited{}'.format(i))
+        middle = viewer.lineCount() // 2
+        for line in range(middle, middle + 50):
+            viewer.lineText(line)
+    return time.perf_counter() - start
+
+
+BENCHMARKS = [
+    ('scene.indexParentWalk', indexParentWalk),
+    ('scene.filterKeystrokes', filterKeystrokes),
+    ('scene.asXml', asXml),
+    ('scene.highlightXml', highlightXml),
+    ('scene.xmlViewerEdits', xmlViewerEdits),
+]
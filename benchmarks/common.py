@@ -0,0 +1,106 @@
+"""
+Shared helpers for the benchmark scripts: making the example folders
+importable and generating synthetic scenes
+
+The examples import their modules by plain name (e.g. ``import node``), so
+the folder of the example has to be on the path before importing them
+
+the benchmarks run headless, the offscreen platform is used unless another
+one is set in QT_QPA_PLATFORM
+"""
+
+import importlib.util
+import os
+import sys
+
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAPPER_PATH = os.path.join(ROOT_PATH, '06-07 data-widget-mapper')
+LIST_VIEW_FILE = os.path.join(ROOT_PATH, '02 list-view', 'main.py')
+TABLE_VIEW_FILE = os.path.join(ROOT_PATH, '03 table-view', 'main.py')
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# keeps the application alive between the benchmarks
+_APPLICATION = list()
+
+# characters share the same joint names, which is what makes names repeat
+JOINT_NAMES = [
+    'Hips', 'Spine', 'Neck', 'Head',
+    'LeftFemur', 'LeftTibia', 'LeftFoot', 'LeftFoot_END',
+    'RightPirateLeg', 'RightPirateLeg_END',
+]
+
+
+def useExample(path=MAPPER_PATH):
+    """
+    Put the example folder in front of the import path
+
+    :param path: str. example folder
+    """
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def application():
+    """
+    :return: QApplication. the running application, created if needed
+    """
+    from Qt import QtWidgets
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        app = QtWidgets.QApplication([])
+        _APPLICATION.append(app)
+    return app
+
+
+def loadModule(name, path):
+    """
+    Import a lesson script by path, the list and table lessons are both
+    called main.py so they can't be imported by name
+
+    :param name: str. module name to register
+    :param path: str. path of the python file
+    :return: module. imported module
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def buildScene(count, depth=4):
+    """
+    Build a synthetic scene of character rigs with the given number of nodes,
+    mixing all the node types; names are built at runtime so that they are
+    not interned by the compiler
+
+    :param count: int. total number of nodes (excluding the root)
+    :param depth: int. depth of each rig chain under the character node
+    :return: Node. root node of the scene
+    """
+    useExample()
+    import node
+
+    types = [node.TransformNode, node.Node, node.LightNode, node.CameraNode]
+    root = node.Node('Root')
+    created = 0
+    character = 0
+    while created < count:
+        parent = node.TransformNode(
+            'Character{}'.format(character), root)
+        created += 1
+        character += 1
+        for index, joint in enumerate(JOINT_NAMES):
+            if created >= count:
+                break
+            # rebuild the name so every node gets its own string object
+            name = '{}{}'.format(joint[:1], joint[1:])
+            nodeType = types[index % len(types)]
+            chainParent = parent if index % depth == 0 else chainParent
+            chainParent = nodeType(name, chainParent)
+            created += 1
+    return root
@@ -0,0 +1,68 @@
+"""
+Print and export a single chain of nodes far deeper than the recursion
+limit, proving the traversals of Node are iterative
+
+the log output is streamed line by line since its indentation alone grows
+quadratically with the depth, and the xml is exported on a single line
+
+usage: python deepChain.py [depth]
+"""
+
+import sys
+import time
+
+import common
+
+
+def buildChain(depth):
+    """
+    :param depth: int. number of nodes under the root
+    :return: Node. root of the chain
+    """
+    common.useExample()
+    import node
+
+    root = node.Node('Root')
+    parent = root
+    for i in range(depth):
+        parent = node.TransformNode('Joint{}'.format(i), parent)
+    return root
+
+
+def run(depth):
+    """
+    Build, print and export the chain
+
+    :param depth: int. depth of the chain
+    :return: dict. benchmark result
+    """
+    root = buildChain(depth)
+
+    start = time.perf_counter()
+    lines = 0
+    characters = 0
+    for line in root.logLines():
+        lines += 1
+        characters += len(line)
+    logSeconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    xml = root.asXml(indent=0)
+    xmlSeconds = time.perf_counter() - start
+
+    return {
+        'depth': depth,
+        'logLines': lines,
+        'logCharacters': characters,
+        'logSeconds': logSeconds,
+        'xmlCharacters': len(xml),
+        'xmlSeconds': xmlSeconds,
+    }
+
+
+if __name__ == '__main__':
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    result = run(depth)
+    print('depth {depth}: log {logLines} lines in {logSeconds:.2f}s, '
+          'xml {xmlCharacters} characters in {xmlSeconds:.2f}s'.format(
+              **result))
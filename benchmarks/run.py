@@ -0,0 +1,106 @@
+"""
+Run the headless benchmark suite and compare the results with a baseline
+
+usage:
+    python run.py                          # 1k scale, print json
+    python run.py --scales 1000,100000,1000000 --output results.json
+    python run.py --filter palette --repeat 5
+    python run.py --compare baseline.json  # exit code 1 on regressions
+
+each result is the best time of the repeats, keyed "name@scale"; compare
+mode flags the results slower than the baseline by more than the threshold
+"""
+
+import argparse
+import json
+import platform
+import sys
+
+import benchPalette
+import benchScene
+
+
+SUITES = [benchPalette, benchScene]
+
+
+def runBenchmarks(scales, repeat=3, pattern=''):
+    """
+    :param scales: list. sizes to run every benchmark at
+    :param repeat: int. runs per benchmark, the best one is kept
+    :param pattern: str. only run the benchmarks of which the name contains
+    the pattern
+    :return: dict. "name@scale" -> seconds
+    """
+    results = dict()
+    for suite in SUITES:
+        for name, function in suite.BENCHMARKS:
+            if pattern not in name:
+                continue
+            for scale in scales:
+                key = '{}@{}'.format(name, scale)
+                results[key] = min(function(scale) for _ in range(repeat))
+                sys.stderr.write('{:<45} {:>10.4f}s\n'.format(
+                    key, results[key]))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    :param results: dict. current results
+    :param baseline: dict. stored results
+    :param threshold: float. allowed slowdown ratio, e.g. 0.2 for 20%
+    :return: list. (key, baseline seconds, seconds, ratio) of regressions
+    """
+    regressions = list()
+    for key, seconds in sorted(results.items()):
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        ratio = seconds / previous
+        if ratio > 1.0 + threshold:
+            regressions.append((key, previous, seconds, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scales', default='1000',
+                        help='comma separated sizes, e.g. 1000,100000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--filter', default='',
+                        help='only run benchmarks containing this text')
+    parser.add_argument('--output', help='write the results json here')
+    parser.add_argument('--compare', help='baseline results json')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown before flagging, 0.2 = 20%%')
+    args = parser.parse_args(argv)
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    results = runBenchmarks(scales, args.repeat, args.filter)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    text = json.dumps(report, indent=4, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for key, previous, seconds, ratio in regressions:
+            sys.stderr.write('REGRESSION {}: {:.4f}s -> {:.4f}s ({:.0%})\n'
+                             .format(key, previous, seconds, ratio - 1.0))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Measure the memory used by a generated scene, the nodes share their names,
+types, icons and default property values so the number should stay low
+
+the same scene is measured a second time with the per-instance layout the
+nodes had before (a name string, type, icon and every default value of
+their own) to show the difference; the QIcons themselves are C++ objects
+which tracemalloc doesn't see, so the baseline is an underestimate
+
+usage: python sceneMemory.py [count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import common
+
+
+def _useOldLayout(root):
+    """
+    Give every node the attributes its __init__ used to set before the names
+    were interned and the defaults moved to the classes
+
+    :param root: Node. root node of the scene
+    """
+    from Qt import QtGui
+    import node
+
+    common.application()
+    for current, depth in root.walk():
+        cls = type(current)
+        attrs = current.__dict__
+        name = current.name
+        attrs['_name'] = name[:1] + name[1:]
+        attrs['_type'] = cls._type
+        attrs['_icon'] = None
+        if cls._iconFile:
+            attrs['_icon'] = QtGui.QIcon(QtGui.QPixmap(
+                os.path.join(node.ICON_PATH, cls._iconFile)))
+        for column in cls.COLUMNS:
+            attr = '_' + column.attr
+            if column.attr not in ('name', 'type'):
+                attrs[attr] = getattr(cls, attr)
+
+
+def _measure(count, oldLayout=False):
+    tracemalloc.start()
+    start = time.perf_counter()
+    root = common.buildScene(count)
+    if oldLayout:
+        _useOldLayout(root)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return root, current, elapsed
+
+
+def run(count):
+    """
+    Build a scene of the given size and measure its memory, then the memory
+    of the same scene in the old per-instance layout
+
+    :param count: int. number of nodes
+    :return: dict. benchmark result
+    """
+    root, current, elapsed = _measure(count)
+    del root
+    root, baseline, baselineElapsed = _measure(count, oldLayout=True)
+    del root
+
+    return {
+        'nodes': count,
+        'seconds': elapsed,
+        'bytes': current,
+        'bytesPerNode': float(current) / count,
+        'baselineBytes': baseline,
+        'baselineBytesPerNode': float(baseline) / count,
+        'savedRatio': 1.0 - float(current) / baseline,
+    }
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    result = run(count)
+    print('{nodes} nodes built in {seconds:.2f}s, '
+          '{bytes} bytes ({bytesPerNode:.1f} bytes/node)'.format(**result))
+    print('old per-instance layout: {baselineBytes} bytes '
+          '({baselineBytesPerNode:.1f} bytes/node), {savedRatio:.0%} '
+          'saved'.format(**result))
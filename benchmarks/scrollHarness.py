@@ -0,0 +1,232 @@
+"""
+Drive real views offscreen (scroll page by page, expand, filter) and record
+per frame how many data()/index()/parent() calls the view makes into the
+model and how long the frame took; frames over the budget are reported as
+missed
+
+usage:
+    python scrollHarness.py --scale 100000 --pages 50
+    python scrollHarness.py --views tree --budget 16 --max-missed 0
+
+the exit code is 1 when more frames than --max-missed miss the budget
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import common
+
+
+VIEW_SIZE = (800, 600)
+
+
+class FrameRecorder(object):
+    def __init__(self, profile, app, budget):
+        """
+        :param profile: Profiler. instrumented profiler counting the calls
+        :param app: QApplication. application to process the events of
+        :param budget: float. frame budget in milliseconds
+        """
+        self._profile = profile
+        self._app = app
+        self._budget = budget
+        self.frames = list()
+
+    def frame(self, view, label, action):
+        """
+        Run the action and paint the view synchronously as one frame
+
+        :param view: QAbstractItemView. view being driven
+        :param label: str. frame description
+        :param action: callable. the interaction of the frame
+        """
+        self._profile.reset()
+        start = time.perf_counter()
+        action()
+        self._app.processEvents()
+        view.viewport().repaint()
+        milliseconds = (time.perf_counter() - start) * 1000
+
+        calls = dict(
+            (method.split('.')[-1], stat.count)
+            for method, stat in self._profile.methodStats().items())
+        self.frames.append({
+            'label': label,
+            'milliseconds': milliseconds,
+            'missed': milliseconds > self._budget,
+            'calls': calls,
+        })
+
+
+def _scrollPages(recorder, view, name, pages):
+    scrollBar = view.verticalScrollBar()
+    for page in range(pages):
+        if scrollBar.value() >= scrollBar.maximum():
+            break
+        recorder.frame(view, '{} scroll page {}'.format(name, page + 1),
+                       lambda: scrollBar.setValue(
+                           scrollBar.value() + scrollBar.pageStep()))
+
+
+def _show(view, model):
+    view.resize(*VIEW_SIZE)
+    view.setModel(model)
+    view.show()
+
+
+def runTree(recorder, scale, pages):
+    from Qt import QtCore, QtWidgets
+    import model
+    import query
+
+    sceneModel = model.SceneGraphModel(common.buildScene(scale))
+    proxyModel = query.QueryFilterProxyModel()
+    proxyModel.setSourceModel(sceneModel)
+    proxyModel.setDynamicSortFilter(True)
+    proxyModel.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+    proxyModel.setFilterRole(model.SceneGraphModel.filterRole)
+
+    # same setup as the main windows
+    view = QtWidgets.QTreeView()
+    view.setUniformRowHeights(True)
+    recorder.frame(view, 'tree show', lambda: _show(view, proxyModel))
+    recorder.frame(view, 'tree expand all', view.expandAll)
+    _scrollPages(recorder, view, 'tree', pages)
+
+    word = 'light'
+    for i in range(1, len(word) + 1):
+        recorder.frame(view, 'tree filter "{}"'.format(word[:i]),
+                       lambda text=word[:i]: proxyModel.setFilterRegExp(text))
+    view.close()
+
+
+def runList(recorder, scale, pages):
+    from Qt import QtGui, QtWidgets
+
+    module = common.loadModule('paletteList', common.LIST_VIEW_FILE)
+    colors = [QtGui.QColor.fromRgb((i * 2654435761) & 0xFFFFFF)
+              for i in range(scale)]
+    view = QtWidgets.QListView()
+    view.setUniformItemSizes(True)
+    listModel = module.PaletteListModel(colors)
+    recorder.frame(view, 'list show', lambda: _show(view, listModel))
+    _scrollPages(recorder, view, 'list', pages)
+    view.close()
+
+
+def runTable(recorder, scale, pages):
+    from Qt import QtGui, QtWidgets
+
+    module = common.loadModule('paletteTable', common.TABLE_VIEW_FILE)
+    columns = 10
+    rows = max(1, scale // columns)
+    data = [
+        [QtGui.QColor.fromRgb(((row * columns + column) * 2654435761)
+                              & 0xFFFFFF) for column in range(columns)]
+        for row in range(rows)
+    ]
+    view = QtWidgets.QTableView()
+    tableModel = module.PaletteTableModel(data, ['Palette'] * columns)
+    cellSize = tableModel.sizeHint()
+    for header, length in ((view.horizontalHeader(), cellSize.width()),
+                           (view.verticalHeader(), cellSize.height())):
+        header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        header.setDefaultSectionSize(length)
+    recorder.frame(view, 'table show', lambda: _show(view, tableModel))
+    _scrollPages(recorder, view, 'table', pages)
+    view.close()
+
+
+def runGrid(recorder, scale, pages):
+    from Qt import QtGui
+
+    module = common.loadModule('paletteTable', common.TABLE_VIEW_FILE)
+    columns = 10
+    rows = max(1, scale // columns)
+    data = [
+        [QtGui.QColor.fromRgb(((row * columns + column) * 2654435761)
+                              & 0xFFFFFF) for column in range(columns)]
+        for row in range(rows)
+    ]
+    view = module.SwatchGridView()
+    tableModel = module.PaletteTableModel(data, ['Palette'] * columns)
+    recorder.frame(view, 'grid show', lambda: _show(view, tableModel))
+    _scrollPages(recorder, view, 'grid', pages)
+    view.close()
+
+
+RUNNERS = {
+    'tree': runTree,
+    'list': runList,
+    'table': runTable,
+    'grid': runGrid,
+}
+
+
+def run(scale, pages, budget, views):
+    """
+    :param scale: int. number of nodes/swatches of each model
+    :param pages: int. maximum number of pages to scroll
+    :param budget: float. frame budget in milliseconds
+    :param views: list. names of RUNNERS to run
+    :return: list. recorded frames
+    """
+    app = common.application()
+    common.useExample()
+    import model
+    import profiler
+
+    listModule = common.loadModule('paletteList', common.LIST_VIEW_FILE)
+    tableModule = common.loadModule('paletteTable', common.TABLE_VIEW_FILE)
+
+    profile = profiler.Profiler()
+    profile.instrument(model.SceneGraphModel, profiler.MODEL_METHODS)
+    profile.instrument(listModule.PaletteListModel, profiler.MODEL_METHODS)
+    profile.instrument(tableModule.PaletteTableModel, profiler.MODEL_METHODS)
+
+    recorder = FrameRecorder(profile, app, budget)
+    try:
+        for name in views:
+            RUNNERS[name](recorder, scale, pages)
+    finally:
+        profile.uninstrument()
+    return recorder.frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scale', type=int, default=10000)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--budget', type=float, default=16.0,
+                        help='frame budget in milliseconds')
+    parser.add_argument('--views', default='tree,list,table,grid')
+    parser.add_argument('--max-missed', type=int, default=None,
+                        help='fail when more frames miss the budget')
+    parser.add_argument('--output', help='write the frames json here')
+    args = parser.parse_args(argv)
+
+    frames = run(args.scale, args.pages, args.budget, args.views.split(','))
+    for frame in frames:
+        calls = ' '.join('{}={}'.format(name, count)
+                         for name, count in sorted(frame['calls'].items()))
+        print('{:<32} {:>9.2f} ms {:<6} {}'.format(
+            frame['label'], frame['milliseconds'],
+            'MISSED' if frame['missed'] else '', calls))
+
+    missed = [frame for frame in frames if frame['missed']]
+    print('{} of {} frames missed the {} ms budget'.format(
+        len(missed), len(frames), args.budget))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(frames, f, indent=4)
+
+    if args.max_missed is not None and len(missed) > args.max_missed:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
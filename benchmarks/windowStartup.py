@@ -0,0 +1,53 @@
+"""
+Measure how long the data widget mapper window takes to open, and how long
+the first selection of each node type takes since the property editors are
+only built then
+
+usage: QT_QPA_PLATFORM=offscreen python windowStartup.py
+"""
+
+import time
+
+import common
+
+
+def run():
+    """
+    Open the main window and select the first node of each type
+
+    :return: dict. benchmark result
+    """
+    common.useExample()
+    from Qt import QtCore, QtWidgets
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    import view
+
+    start = time.perf_counter()
+    window = view.MainWindow()
+    window.show()
+    app.processEvents()
+    result = {'openSeconds': time.perf_counter() - start}
+
+    proxyModel = window.uiTree.model()
+    selectionModel = window.uiTree.selectionModel()
+    for row in range(proxyModel.rowCount(QtCore.QModelIndex())):
+        index = proxyModel.index(row, 0, QtCore.QModelIndex())
+        ntype = proxyModel.mapToSource(index).internalPointer().type
+        key = 'firstSelect_{}_Seconds'.format(ntype)
+        if key in result:
+            continue
+        start = time.perf_counter()
+        selectionModel.setCurrentIndex(
+            index, QtCore.QItemSelectionModel.ClearAndSelect)
+        app.processEvents()
+        result[key] = time.perf_counter() - start
+
+    window.close()
+    return result
+
+
+if __name__ == '__main__':
+    for key, seconds in sorted(run().items()):
+        print('{}: {:.1f} ms'.format(key, seconds * 1000))
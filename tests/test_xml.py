@@ -0,0 +1,88 @@
+"""
+The xml of the data widget mapper example must stay the text the original
+QDomDocument implementation produced, the export and the xml viewer both
+show it
+
+the attributes are compared as sets: QDomDocument writes them in the order
+of its hash, which changes from run to run
+
+usage: QT_QPA_PLATFORM=offscreen python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import unittest
+
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_PATH, '06-07 data-widget-mapper'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets, QtXml
+
+import node
+
+
+ATTRIBUTE = re.compile(r' (\w+)="([^"]*)"')
+
+
+def baselineXml(rootNode):
+    """
+    :param rootNode: Node. top of the hierarchy
+    :return: str. xml of the hierarchy as Node.asXml() used to write it
+    """
+    doc = QtXml.QDomDocument()
+    element = doc.createElement(rootNode.type)
+    doc.appendChild(element)
+    stack = [(child, element) for child in reversed(
+        [rootNode.child(row) for row in range(rootNode.childCount)])]
+    while stack:
+        current, parentElement = stack.pop()
+        element = doc.createElement(current.type)
+        parentElement.appendChild(element)
+        for k, v in current.attrs().items():
+            element.setAttribute(k, v)
+        stack.extend((current.child(row), element)
+                     for row in reversed(range(current.childCount)))
+    return doc.toString(4)
+
+
+def normalized(text):
+    """
+    :return: list. (line without attributes, set of attributes) per line
+    """
+    return [(ATTRIBUTE.sub('', line), set(ATTRIBUTE.findall(line)))
+            for line in text.split('\n')]
+
+
+class AsXmlTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = (QtWidgets.QApplication.instance()
+                   or QtWidgets.QApplication([]))
+
+    def setUp(self):
+        self.root = node.Node('Root')
+        transform = node.TransformNode('A & B', self.root)
+        light = node.LightNode('B', transform)
+        light.intensity = 2.5
+        light.castShadows = False
+        camera = node.CameraNode('C', self.root)
+        camera.shakeIntensity = 12.125
+        node.TransformNode('D', camera)
+
+    def testMatchesBaseline(self):
+        text = self.root.asXml()
+        self.assertFalse(text.startswith('\n'))
+        self.assertTrue(text.endswith('>\n'))
+        self.assertEqual(normalized(text),
+                         normalized(baselineXml(self.root)))
+
+    def testEmptyRoot(self):
+        root = node.Node('Root')
+        self.assertEqual(root.asXml(), baselineXml(root))
+
+
+if __name__ == '__main__':
+    unittest.main()